@@ -0,0 +1,49 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+
+from users.models import User
+
+from .models import Enrollment
+
+ENROLLMENT_CACHE_KEY = "enrolled-courses:{user_id}:{version}"
+# Memoized on the user object so repeated checks in one request skip the cache too.
+REQUEST_ATTR = "_enrolled_course_ids"
+
+
+def _cache_key(user):
+    return ENROLLMENT_CACHE_KEY.format(user_id=user.pk, version=user.enrollment_version)
+
+
+def get_enrolled_course_ids(user):
+    """Return the frozenset of course ids the user is enrolled in."""
+    if not user.is_authenticated:
+        return frozenset()
+
+    course_ids = getattr(user, REQUEST_ATTR, None)
+    if course_ids is not None:
+        return course_ids
+
+    # The key carries user.enrollment_version, so a set cached before any
+    # enrollment change, on any worker, is simply never read again.
+    key = _cache_key(user)
+    course_ids = cache.get(key)
+    if course_ids is None:
+        course_ids = frozenset(
+            Enrollment.objects.filter(user_id=user.pk).values_list("course_id", flat=True)
+        )
+        cache.set(key, course_ids, getattr(settings, "ENROLLMENT_CACHE_TTL", 300))
+    setattr(user, REQUEST_ATTR, course_ids)
+    return course_ids
+
+
+def is_enrolled(user, course_id):
+    return course_id in get_enrolled_course_ids(user)
+
+
+def invalidate_enrollments(user_id, user=None):
+    User.objects.filter(pk=user_id).update(enrollment_version=F("enrollment_version") + 1)
+    if user is not None:
+        user.refresh_from_db(fields=["enrollment_version"])
+        if hasattr(user, REQUEST_ATTR):
+            delattr(user, REQUEST_ATTR)
@@ -1,9 +1,29 @@
 from django.contrib import admin
 from .models import Category, Course, Lesson, Material, Enrollment, QuestionAnswer
 
-admin.site.register(Category)
-admin.site.register(Course)
-admin.site.register(Lesson)
-admin.site.register(Material)
-admin.site.register(Enrollment)
-admin.site.register(QuestionAnswer)
+
+class ArchivedAdmin(admin.ModelAdmin):
+    """Show soft-deleted rows too, so they can be inspected and restored."""
+
+    list_filter = ("is_active",)
+
+    def get_queryset(self, request):
+        queryset = self.model.all_objects.get_queryset()
+        ordering = self.get_ordering(request)
+        return queryset.order_by(*ordering) if ordering else queryset
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        # The default managers hide archived rows, which would make an existing
+        # reference to one invalid in the change form.
+        related = db_field.related_model
+        if "queryset" not in kwargs and hasattr(related, "all_objects"):
+            kwargs["queryset"] = related.all_objects.all()
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+
+admin.site.register(Category, ArchivedAdmin)
+admin.site.register(Course, ArchivedAdmin)
+admin.site.register(Lesson, ArchivedAdmin)
+admin.site.register(Material, ArchivedAdmin)
+admin.site.register(Enrollment, ArchivedAdmin)
+admin.site.register(QuestionAnswer, ArchivedAdmin)
@@ -0,0 +1,112 @@
+import asyncio
+import json
+import threading
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+def user_channel(user_id):
+    return f"user:{user_id}"
+
+
+def lesson_channel(lesson_id):
+    return f"lesson:{lesson_id}"
+
+
+class Subscription:
+    """Queue of events for one subscriber, fed from any thread."""
+
+    def __init__(self, broker, channels, maxsize=100):
+        self.broker = broker
+        self.channels = tuple(channels)
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=maxsize)
+
+    def put(self, event):
+        """Queue ``event``; return False once the subscriber's loop has closed."""
+        if self.loop.is_closed():
+            return False
+        try:
+            self.loop.call_soon_threadsafe(self._put_nowait, event)
+        except RuntimeError:  # closed between the check and the call
+            return False
+        return True
+
+    def _put_nowait(self, event):
+        # A slow client drops events rather than growing memory without bound.
+        if not self.queue.full():
+            self.queue.put_nowait(event)
+
+    async def get(self, timeout=None):
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class Broker:
+    """Pub/sub interface; swap implementations via settings.EVENTS_BROKER."""
+
+    def publish(self, channel, event):
+        raise NotImplementedError
+
+    def subscribe(self, channels):
+        raise NotImplementedError
+
+    def unsubscribe(self, subscription):
+        raise NotImplementedError
+
+
+class InProcessBroker(Broker):
+    """Fan-out within the current process. Run one ASGI worker, or use a shared broker."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}
+
+    def publish(self, channel, event):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            if not subscription.put(event):
+                self.unsubscribe(subscription)
+
+    def subscribe(self, channels):
+        subscription = Subscription(self, channels)
+        with self._lock:
+            for channel in subscription.channels:
+                self._subscribers.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._subscribers.get(channel)
+                if subscribers is None:
+                    continue
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[channel]
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                path = getattr(settings, "EVENTS_BROKER", "core.events.InProcessBroker")
+                _broker = import_string(path)()
+    return _broker
+
+
+def publish(channel, event_type, data):
+    get_broker().publish(channel, {"type": event_type, "data": data})
+
+
+def format_sse(event):
+    return f"event: {event['type']}\ndata: {json.dumps(event['data'])}\n\n"
@@ -0,0 +1,265 @@
+"""Deterministic synthetic LMS data for performance work and test fixtures.
+
+Rows get explicit primary keys so related rows can be built without reading
+anything back. Inserts are chunked ``executemany`` calls inside one transaction:
+columns that are the same for every row are converted to database values once
+per table instead of once per row, which is where ``bulk_create`` spends most of
+its time at this volume. Signals do not fire; caches fed by them are cleared.
+"""
+
+import random
+import sqlite3
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.management.color import no_style
+from django.db import connections, transaction
+from django.utils import timezone
+
+from users.models import User
+
+from .models import Category, Course, Enrollment, Lesson, LessonProgress, Material
+
+DEFAULT_COUNTS = {
+    "categories": 10,
+    "admins": 2,
+    "teachers": 50,
+    "students": 1000,
+    "courses": 200,
+    "lessons_per_course": 20,
+    "materials_per_course": 5,
+    "enrollments_per_student": 5,
+    "progress_ratio": 0.5,
+}
+DEFAULT_PASSWORD = "password"
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def _next_id(model, using):
+    last = model._base_manager.using(using).order_by("-pk").values_list("pk", flat=True).first()
+    return (last or 0) + 1
+
+
+class Seeder:
+    def __init__(self, counts=None, seed=0, chunk_size=5000, using="default"):
+        self.counts = {**DEFAULT_COUNTS, **(counts or {})}
+        self.rng = random.Random(seed)
+        self.chunk_size = chunk_size
+        self.using = using
+        self.connection = connections[using]
+        self.now = timezone.now()
+        self.created = {}
+
+    def _insert(self, model, varying, rows, constants=None):
+        """Insert ``rows`` (tuples of plain values for the ``varying`` fields).
+
+        Every other column gets ``constants[name]``, ``now`` for auto_now fields,
+        or the field default, prepared for the database once.
+        """
+        constants = constants or {}
+        prepared = {}
+        for field in model._meta.concrete_fields:
+            if field.name in varying or (field.primary_key and "id" not in varying):
+                continue
+            if field.name in constants:
+                value = constants[field.name]
+            elif getattr(field, "auto_now", False) or getattr(field, "auto_now_add", False):
+                value = self.now
+            else:
+                value = field.get_default()
+            prepared[field.name] = field.get_db_prep_save(value, self.connection)
+
+        quote = self.connection.ops.quote_name
+        columns = [model._meta.get_field(name).column for name in [*varying, *prepared]]
+        sql = "INSERT INTO {} ({}) VALUES ({})".format(
+            quote(model._meta.db_table),
+            ", ".join(quote(column) for column in columns),
+            ", ".join(["%s"] * len(columns)),
+        )
+        suffix = tuple(prepared.values())
+        total = 0
+        with self.connection.cursor() as cursor:
+            for chunk in _chunks(rows, self.chunk_size):
+                cursor.executemany(sql, [row + suffix for row in chunk])
+                total += len(chunk)
+        self.created[model.__name__] = self.created.get(model.__name__, 0) + total
+
+    def run(self):
+        with transaction.atomic(using=self.using):
+            self._seed()
+        self._reset_sequences()
+        cache.clear()
+        return self.created
+
+    def _seed(self):
+        counts = self.counts
+        rng = self.rng
+
+        user_id = _next_id(User, self.using)
+        ids_by_role = {}
+        for role in ("admin", "teacher", "student"):
+            count = counts[role + "s"]
+            ids_by_role[role] = range(user_id, user_id + count)
+            user_id += count
+        for role, ids in ids_by_role.items():
+            self._insert(
+                User,
+                ["id", "username", "email"],
+                ((pk, f"{role}{pk}", f"{role}{pk}@example.com") for pk in ids),
+                # One hash for everyone: PBKDF2 per row would dominate the run time.
+                constants={
+                    "password": make_password(DEFAULT_PASSWORD),
+                    "role": role,
+                    "is_staff": role == "admin",
+                    "date_joined": self.now,
+                },
+            )
+
+        category_start = _next_id(Category, self.using)
+        category_ids = range(category_start, category_start + counts["categories"])
+        self._insert(
+            Category, ["id", "title"], ((pk, f"Category {pk}") for pk in category_ids)
+        )
+
+        teachers = ids_by_role["teacher"]
+        course_start = _next_id(Course, self.using)
+        course_ids = range(course_start, course_start + counts["courses"])
+        prices = {pk: float(rng.randrange(0, 200)) for pk in course_ids}
+        self._insert(
+            Course,
+            ["id", "title", "price", "duration", "category", "instructor"],
+            (
+                (
+                    pk,
+                    f"Course {pk}",
+                    prices[pk],
+                    float(rng.randrange(1, 40)),
+                    rng.choice(category_ids),
+                    rng.choice(teachers),
+                )
+                for pk in course_ids
+            ),
+            constants={
+                "description": "Synthetic course",
+                "banner": "course_banners/placeholder.jpg",
+            },
+        )
+
+        per_course = counts["lessons_per_course"]
+        lesson_start = _next_id(Lesson, self.using)
+
+        def lesson_ids(course_id):
+            first = lesson_start + (course_id - course_start) * per_course
+            return range(first, first + per_course)
+
+        self._insert(
+            Lesson,
+            ["id", "title", "video", "course"],
+            (
+                (pk, f"Lesson {pk}", f"videos/{pk}.mp4", course_id)
+                for course_id in course_ids
+                for pk in lesson_ids(course_id)
+            ),
+            constants={"description": "Synthetic lesson"},
+        )
+
+        self._insert(
+            Material,
+            ["title", "file", "course"],
+            (
+                (f"Material {course_id}-{n}", f"materials/{course_id}_{n}.pdf", course_id)
+                for course_id in course_ids
+                for n in range(counts["materials_per_course"])
+            ),
+            constants={"description": "Synthetic material", "file_type": "pdf"},
+        )
+
+        per_student = min(counts["enrollments_per_student"], len(course_ids))
+        enrollment_start = _next_id(Enrollment, self.using)
+        enrollments = [
+            (student_id, course_id)
+            for student_id in ids_by_role["student"]
+            for course_id in rng.sample(course_ids, per_student)
+        ]
+        completed = int(per_course * counts["progress_ratio"])
+
+        def pointers(course_id):
+            lessons = lesson_ids(course_id)
+            last = lessons[completed - 1] if completed else None
+            following = lessons[completed] if completed < len(lessons) else None
+            return last, following
+
+        self._insert(
+            Enrollment,
+            ["id", "user", "course", "price", "last_lesson", "next_lesson"],
+            (
+                (enrollment_start + i, student_id, course_id, prices[course_id])
+                + pointers(course_id)
+                for i, (student_id, course_id) in enumerate(enrollments)
+            ),
+            constants={
+                "progress": int(completed / per_course * 100) if per_course else 0
+            },
+        )
+
+        self._insert(
+            LessonProgress,
+            ["enrollment", "lesson"],
+            (
+                (enrollment_start + i, lesson_id)
+                for i, (_, course_id) in enumerate(enrollments)
+                for lesson_id in lesson_ids(course_id)[:completed]
+            ),
+            constants={"is_completed": True, "completed_at": self.now},
+        )
+
+        if course_ids:
+            Course.refresh_counters(pk__range=(course_ids[0], course_ids[-1]))
+
+    def _reset_sequences(self):
+        # Explicit ids leave PostgreSQL sequences behind; SQLite needs nothing.
+        connection = self.connection
+        statements = connection.ops.sequence_reset_sql(
+            no_style(), [User, Category, Course, Lesson, Material, Enrollment, LessonProgress]
+        )
+        if statements:
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
+
+
+def seed(counts=None, seed=0, chunk_size=5000, using="default"):
+    return Seeder(counts, seed, chunk_size, using).run()
+
+
+def _sqlite_connection(using):
+    connection = connections[using]
+    if connection.vendor != "sqlite":
+        raise ValueError("Snapshots are only supported on SQLite databases.")
+    connection.ensure_connection()
+    return connection.connection
+
+
+def save_snapshot(path, using="default"):
+    """Copy the whole SQLite database to ``path`` with the online backup API."""
+    target = sqlite3.connect(path)
+    try:
+        _sqlite_connection(using).backup(target)
+    finally:
+        target.close()
+
+
+def restore_snapshot(path, using="default"):
+    """Overwrite the SQLite database (including an in-memory test DB) from ``path``."""
+    source = sqlite3.connect(path)
+    try:
+        source.backup(_sqlite_connection(using))
+    finally:
+        source.close()
+    cache.clear()
@@ -0,0 +1,150 @@
+import datetime
+import math
+
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+
+from .models import Course, Lesson, Material, QuestionAnswer
+
+
+# Database integer columns are at most signed 64-bit; larger values overflow the driver.
+INT_MIN, INT_MAX = -(2**63), 2**63 - 1
+
+
+def parse_int(value):
+    parsed = int(value)
+    if not INT_MIN <= parsed <= INT_MAX:
+        raise ValueError(value)
+    return parsed
+
+
+def parse_float(value):
+    parsed = float(value)
+    if not math.isfinite(parsed):
+        raise ValueError(value)
+    return parsed
+
+
+def parse_timestamp(value):
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(value)
+        parsed = datetime.datetime.combine(day, datetime.time.min)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def _indexed_fields(model):
+    """Names of fields that lead an index, so filters and sorts on them can use it."""
+    opts = model._meta
+    names = {opts.pk.name}
+    for field in opts.concrete_fields:
+        if field.db_index or field.unique:
+            names.update((field.name, field.attname))
+    leading = [index.fields[0].lstrip("-") for index in opts.indexes]
+    leading += [fields[0] for fields in opts.unique_together]
+    for name in leading:
+        field = opts.get_field(name)
+        names.update((field.name, field.attname))
+    return names
+
+
+class ListFilter:
+    """Declarative query-param filtering and ordering for a list view.
+
+    ``filters`` maps a query param to ``(lookup, parser)``; ``ordering`` lists the
+    fields clients may sort by. Every field used must be indexed, which is checked
+    when the subclass is defined rather than on the first request.
+    """
+
+    model = None
+    filters = {}
+    ordering = ("id",)
+    default_ordering = "-id"
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        indexed = _indexed_fields(cls.model)
+        fields = {lookup.split("__")[0] for lookup, _ in cls.filters.values()}
+        fields.update(cls.ordering)
+        fields.add(cls.default_ordering.lstrip("-"))
+        unindexed = sorted(f for f in fields if f not in indexed and f != "pk")
+        if unindexed:
+            raise ImproperlyConfigured(
+                f"{cls.__name__} uses unindexed fields: {', '.join(unindexed)}"
+            )
+
+    @classmethod
+    def apply(cls, queryset, params):
+        lookups = {}
+        errors = {}
+        for param, (lookup, parser) in cls.filters.items():
+            value = params.get(param)
+            if value in (None, ""):
+                continue
+            try:
+                lookups[lookup] = parser(value)
+            except ValueError:
+                errors[param] = f"Invalid value: {value}"
+
+        ordering = params.get("ordering") or cls.default_ordering
+        if ordering.lstrip("-") not in cls.ordering:
+            errors["ordering"] = f"Allowed: {', '.join(cls.ordering)}"
+        if errors:
+            raise ValidationError(errors)
+
+        # Secondary sort on pk keeps pagination stable for equal values.
+        tiebreak = "-id" if ordering.startswith("-") else "id"
+        order_by = (ordering,) if ordering.lstrip("-") == "id" else (ordering, tiebreak)
+        return queryset.filter(**lookups).order_by(*order_by)
+
+
+class CourseFilter(ListFilter):
+    model = Course
+    filters = {
+        "category": ("category_id", parse_int),
+        "instructor": ("instructor_id", parse_int),
+        "price_min": ("price__gte", parse_float),
+        "price_max": ("price__lte", parse_float),
+        "created_after": ("created_at__gte", parse_timestamp),
+        "created_before": ("created_at__lt", parse_timestamp),
+    }
+    ordering = ("id", "price", "created_at")
+
+
+class LessonFilter(ListFilter):
+    model = Lesson
+    filters = {
+        "course": ("course_id", parse_int),
+        "created_after": ("created_at__gte", parse_timestamp),
+        "created_before": ("created_at__lt", parse_timestamp),
+    }
+    ordering = ("id", "created_at")
+    default_ordering = "id"
+
+
+class MaterialFilter(ListFilter):
+    model = Material
+    filters = {
+        "course": ("course_id", parse_int),
+        "created_after": ("created_at__gte", parse_timestamp),
+        "created_before": ("created_at__lt", parse_timestamp),
+    }
+    ordering = ("id", "created_at")
+    default_ordering = "id"
+
+
+class QuestionAnswerFilter(ListFilter):
+    model = QuestionAnswer
+    filters = {
+        "lesson": ("lesson_id", parse_int),
+        "user": ("user_id", parse_int),
+        "created_after": ("created_at__gte", parse_timestamp),
+        "created_before": ("created_at__lt", parse_timestamp),
+    }
+    ordering = ("id", "created_at")
@@ -0,0 +1,101 @@
+import hashlib
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+HEADER = "Idempotency-Key"
+
+
+def _ttl():
+    return timedelta(seconds=getattr(settings, "IDEMPOTENCY_KEY_TTL", 24 * 60 * 60))
+
+
+def _in_flight_timeout():
+    # A reservation this old belongs to a worker that died mid-request.
+    return timedelta(seconds=getattr(settings, "IDEMPOTENCY_IN_FLIGHT_TIMEOUT", 60))
+
+
+def _fingerprint(request):
+    """Method and path, plus a hash of the query string and body."""
+    digest = hashlib.sha256()
+    digest.update(request.META.get("QUERY_STRING", "").encode())
+    digest.update(b"\0")
+    digest.update(request.body)
+    return f"{request.method} {request.path}"[:190] + f" {digest.hexdigest()}"
+
+
+def _reserve(user, key, fingerprint):
+    """Insert an in-flight row for the key; return the existing row if there is one."""
+    now = timezone.now()
+    IdempotencyKey.objects.filter(user=user, key=key).filter(
+        Q(created_at__lt=now - _ttl())
+        | Q(status_code__isnull=True, created_at__lt=now - _in_flight_timeout())
+    ).delete()
+    try:
+        with transaction.atomic():
+            IdempotencyKey.objects.create(user=user, key=key, fingerprint=fingerprint)
+    except IntegrityError:
+        return IdempotencyKey.objects.filter(user=user, key=key).first()
+    return None
+
+
+def idempotent(view):
+    """Replay the stored response when a POST repeats its Idempotency-Key.
+
+    Apply below ``@api_view`` so the request is already authenticated. Keys are
+    scoped per user. Reusing one for a different endpoint, query or body is
+    rejected with 422; a retry while the first request is still running gets 409.
+    """
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key or request.method != "POST" or not request.user.is_authenticated:
+            return view(request, *args, **kwargs)
+        if len(key) > 255:
+            return Response({"detail": f"{HEADER} is too long."}, status=400)
+
+        fingerprint = _fingerprint(request)
+        # The (user, key) unique constraint makes the reservation the lock: only
+        # one request per key gets to run the view.
+        record = _reserve(request.user, key, fingerprint)
+        if record is not None:
+            if record.fingerprint != fingerprint:
+                return Response(
+                    {"detail": f"{HEADER} was already used for another request."},
+                    status=422,
+                )
+            if record.status_code is None:
+                return Response(
+                    {"detail": f"A request with this {HEADER} is still in progress."},
+                    status=409,
+                )
+            response = Response(record.response_body, status=record.status_code)
+            response["Idempotent-Replayed"] = "true"
+            return response
+
+        reserved = IdempotencyKey.objects.filter(user=request.user, key=key)
+        try:
+            response = view(request, *args, **kwargs)
+        except BaseException:
+            reserved.delete()
+            raise
+        # Server errors are not stored, so the client may retry them.
+        if response.status_code < 500:
+            reserved.update(status_code=response.status_code, response_body=response.data)
+        else:
+            reserved.delete()
+        return response
+
+    return wrapper
+
+
+def purge_expired_keys():
+    return IdempotencyKey.objects.filter(created_at__lt=timezone.now() - _ttl()).delete()[0]
@@ -0,0 +1,115 @@
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from unittest import mock
+
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand
+
+from core.throttling import (
+    LessonCompleteThrottle,
+    get_throttle_setting,
+    parse_rate,
+    take_token,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the per-request overhead of the token-bucket throttle, check that "
+        "concurrent requests never take more tokens than the bucket holds, and "
+        "that a sustained client is held to the configured rate."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=20000)
+        parser.add_argument("--users", type=int, default=500)
+        parser.add_argument("--threads", type=int, default=16)
+        parser.add_argument("--capacity", type=int, default=50)
+        parser.add_argument(
+            "--sustain",
+            type=float,
+            default=600,
+            help="Simulated seconds of a client retrying as fast as --sustain-rps allows.",
+        )
+        parser.add_argument("--sustain-rps", type=float, default=10)
+
+    def handle(self, *args, **options):
+        cache = caches[get_throttle_setting("CACHE")]
+        self._overhead(options["iterations"], options["users"])
+        self._contention(cache, options["threads"], options["capacity"])
+        for rate in ("60/min:20", "10/min:5", "30/min"):
+            self._sustained(rate, options["sustain"], options["sustain_rps"])
+
+    def _overhead(self, iterations, users):
+        throttle = LessonCompleteThrottle()
+        requests = [
+            SimpleNamespace(
+                method="POST",
+                user=SimpleNamespace(is_authenticated=True, role="student", pk=-(i + 1)),
+            )
+            for i in range(users)
+        ]
+        samples = []
+        allowed = 0
+        for i in range(iterations):
+            request = requests[i % users]
+            started = time.perf_counter()
+            allowed += throttle.allow_request(request, None)
+            samples.append((time.perf_counter() - started) * 1e6)
+        samples.sort()
+        self.stdout.write(
+            f"allow_request over {iterations} calls ({users} users): "
+            f"mean {statistics.fmean(samples):.1f}us  "
+            f"p50 {samples[len(samples) // 2]:.1f}us  "
+            f"p99 {samples[int(len(samples) * 0.99)]:.1f}us  "
+            f"allowed {allowed}"
+        )
+
+    def _contention(self, cache, threads, capacity):
+        # A very slow refill, so only the initial capacity can be taken.
+        key = f"throttle:benchmark:{time.time_ns()}"
+        attempts = capacity * 4
+        barrier = threading.Barrier(threads)
+        # Seed the bucket so every thread goes through the atomic increment.
+        take_token(key, capacity, 1e-6, cache=cache)
+
+        def worker(_):
+            barrier.wait()
+            return sum(
+                take_token(key, capacity, 1e-6, cache=cache)[0]
+                for _ in range(attempts // threads)
+            )
+
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            granted = 1 + sum(pool.map(worker, range(threads)))
+        style = self.style.SUCCESS if granted == capacity else self.style.ERROR
+        self.stdout.write(
+            style(
+                f"{threads} threads, {attempts} attempts on one bucket of {capacity}: "
+                f"{granted} granted"
+            )
+        )
+
+    def _sustained(self, rate, seconds, rps):
+        # A fake clock drives both the bucket and the cache's expiry, so minutes
+        # of traffic (and any premature key expiry) are simulated instantly.
+        capacity, refill_rate = parse_rate(rate)
+        cache = LocMemCache(f"throttle-benchmark-{time.time_ns()}", {})
+        clock = SimpleNamespace(now=1_000_000.0)
+        admitted = 0
+        with mock.patch("time.time", lambda: clock.now):
+            for step in range(int(seconds * rps)):
+                clock.now = 1_000_000.0 + step / rps
+                admitted += take_token("sustained", capacity, refill_rate, cache=cache)[0]
+        limit = capacity + int(refill_rate * seconds)
+        style = self.style.SUCCESS if admitted <= limit else self.style.ERROR
+        self.stdout.write(
+            style(
+                f"{rate} sustained for {seconds:.0f}s at {rps:g} req/s: "
+                f"{admitted} admitted, at most {limit} allowed"
+            )
+        )
@@ -0,0 +1,107 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Runs in a fresh interpreter: the same imports a worker pays before serving.
+PROBE = """
+import importlib, json, sys, time
+started = time.perf_counter()
+importlib.import_module({module!r})
+sys.stdout.write(json.dumps({{"total_ms": (time.perf_counter() - started) * 1000}}))
+"""
+
+
+def parse_importtime(stderr):
+    """Yield (module, self_us, cumulative_us) from ``python -X importtime`` output."""
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        if not self_us.strip().isdigit():
+            continue  # header row
+        yield name.strip(), int(self_us), int(cumulative_us)
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure how long a fresh worker takes to import the WSGI application "
+        "(settings, apps, URLconf and views) and fail if it exceeds a budget."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--runs", type=int, default=5, help="Timed runs; the median is used.")
+        parser.add_argument("--top", type=int, default=15)
+        parser.add_argument(
+            "--budget-ms",
+            type=float,
+            default=getattr(settings, "IMPORT_TIME_BUDGET_MS", None),
+            help="Exit non-zero when the median exceeds this (default: IMPORT_TIME_BUDGET_MS).",
+        )
+        parser.add_argument("--output", help="Write the JSON report to this file.")
+
+    def handle(self, *args, **options):
+        module = settings.WSGI_APPLICATION.rpartition(".")[0]
+        totals = [self._probe(module)[0] for _ in range(max(options["runs"], 1))]
+        # -X importtime adds its own overhead, so the breakdown comes from a separate run.
+        _, stderr = self._probe(module, importtime=True)
+        rows = list(parse_importtime(stderr))
+
+        packages = defaultdict(int)
+        for name, self_us, _ in rows:
+            packages[name.partition(".")[0]] += self_us
+        report = {
+            "module": module,
+            "median_ms": statistics.median(totals),
+            "runs_ms": totals,
+            "budget_ms": options["budget_ms"],
+            "packages_ms": {
+                name: us / 1000
+                for name, us in sorted(packages.items(), key=lambda item: -item[1])[: options["top"]]
+            },
+            "modules_ms": {
+                name: cumulative / 1000
+                for name, _, cumulative in sorted(rows, key=lambda row: -row[2])[: options["top"]]
+            },
+        }
+        self._print(report)
+        if options["output"]:
+            with open(options["output"], "w") as fh:
+                json.dump(report, fh, indent=2)
+
+        budget = options["budget_ms"]
+        if budget is not None and report["median_ms"] > budget:
+            raise CommandError(
+                f"Import time {report['median_ms']:.1f}ms exceeds the {budget:.1f}ms budget."
+            )
+
+    def _probe(self, module, importtime=False):
+        command = [sys.executable]
+        if importtime:
+            command += ["-X", "importtime"]
+        command += ["-c", PROBE.format(module=module)]
+        env = {**os.environ, "DJANGO_SETTINGS_MODULE": os.environ["DJANGO_SETTINGS_MODULE"]}
+        result = subprocess.run(
+            command, cwd=settings.BASE_DIR, env=env, capture_output=True, text=True
+        )
+        if result.returncode:
+            raise CommandError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+        return json.loads(result.stdout)["total_ms"], result.stderr
+
+    def _print(self, report):
+        self.stdout.write(
+            f"{report['module']}: median {report['median_ms']:.1f}ms over "
+            f"{len(report['runs_ms'])} runs"
+            + (f" (budget {report['budget_ms']:.1f}ms)" if report["budget_ms"] is not None else "")
+        )
+        self.stdout.write("Self time by package:")
+        for name, ms in report["packages_ms"].items():
+            self.stdout.write(f"  {name:<30} {ms:8.1f}ms")
+        self.stdout.write("Slowest imports (cumulative):")
+        for name, ms in report["modules_ms"].items():
+            self.stdout.write(f"  {name:<50} {ms:8.1f}ms")
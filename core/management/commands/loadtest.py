@@ -0,0 +1,275 @@
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.models import Course, Enrollment, Lesson
+from users.models import User
+
+DEFAULT_MIX = "browse=50,lessons=30,complete=15,enroll=5"
+BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+
+class Scenarios:
+    """Weighted request generators built from the real URL map and seeded data."""
+
+    def __init__(self, tokens, course_ids, lessons_by_course, enrollments):
+        self.tokens = tokens
+        self.course_ids = course_ids
+        self.lessons_by_course = lessons_by_course
+        self.enrollments = enrollments
+        self.tokens_by_id = {
+            user_id: token for pairs in tokens.values() for user_id, token in pairs
+        }
+
+    def _token(self, rng, role):
+        return rng.choice(self.tokens[role])[1]
+
+    def browse(self, rng):
+        role = rng.choice(("student", "student", "teacher", "admin"))
+        name = rng.choice(("course-list-create", "category-list-create"))
+        return "GET", reverse(name), self._token(rng, role)
+
+    def lessons(self, rng):
+        user_id, course_id = rng.choice(self.enrollments)
+        return "GET", reverse("course-bundle", args=[course_id]), self.tokens_by_id[user_id]
+
+    def complete(self, rng):
+        user_id, course_id = rng.choice(self.enrollments)
+        lesson_id = rng.choice(self.lessons_by_course[course_id])
+        path = reverse("mark-lesson-completed", args=[lesson_id])
+        return "POST", path, self.tokens_by_id[user_id]
+
+    def enroll(self, rng):
+        course_id = rng.choice(self.course_ids)
+        return "POST", reverse("enroll-course", args=[course_id]), self._token(rng, "student")
+
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.throttled = defaultdict(int)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+
+    def record(self, scenario, status, elapsed_ms):
+        with self.lock:
+            self.statuses[scenario][status] += 1
+            # A 429 returns before the view runs; timing it would flatter latency.
+            if status == 429:
+                self.throttled[scenario] += 1
+                return
+            self.latencies[scenario].append(elapsed_ms)
+            if status == 0 or status >= 500:
+                self.errors[scenario] += 1
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def histogram(values):
+    counts = [0] * (len(BUCKETS_MS) + 1)
+    for value in values:
+        for i, bound in enumerate(BUCKETS_MS):
+            if value <= bound:
+                counts[i] += 1
+                break
+        else:
+            counts[-1] += 1
+    labels = [f"<={bound}ms" for bound in BUCKETS_MS] + [f">{BUCKETS_MS[-1]}ms"]
+    return dict(zip(labels, counts))
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay a weighted traffic mix (browse, lessons, complete, enroll) against a "
+        "running server and report throughput, latency and error rates. Throttled "
+        "(429) responses are counted apart from latency and throughput; to measure "
+        "the app rather than the limits, start the server with THROTTLING_ENABLED=0 "
+        "or spread the load with a larger --users."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+        parser.add_argument("--concurrency", type=int, default=10)
+        parser.add_argument("--duration", type=float, default=30, help="Seconds to run.")
+        parser.add_argument("--mix", default=DEFAULT_MIX)
+        parser.add_argument("--users", type=int, default=50, help="Users per role.")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--output", help="Write the JSON report to this file.")
+        parser.add_argument("--baseline", help="Compare against a previous JSON report.")
+
+    def handle(self, *args, **options):
+        mix = self._parse_mix(options["mix"])
+        scenarios = self._build_scenarios(options["users"], mix)
+        base_url = options["base_url"].rstrip("/")
+        stats = Stats()
+        deadline = time.monotonic() + options["duration"]
+        names, weights = zip(*mix.items())
+
+        def worker(worker_id):
+            worker_rng = random.Random(options["seed"] * 1000 + worker_id)
+            while time.monotonic() < deadline:
+                name = worker_rng.choices(names, weights)[0]
+                method, path, token = getattr(scenarios, name)(worker_rng)
+                status, elapsed = self._request(base_url, method, path, token)
+                stats.record(name, status, elapsed)
+
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as pool:
+            list(pool.map(worker, range(options["concurrency"])))
+        wall = time.monotonic() - started
+
+        report = self._report(stats, wall, options["concurrency"])
+        self._print(report)
+        if options["baseline"]:
+            with open(options["baseline"]) as fh:
+                self._compare(report, json.load(fh))
+        if options["output"]:
+            with open(options["output"], "w") as fh:
+                json.dump(report, fh, indent=2)
+
+    def _parse_mix(self, value):
+        mix = {}
+        for part in value.split(","):
+            name, _, weight = part.partition("=")
+            name = name.strip()
+            if name not in ("browse", "lessons", "complete", "enroll"):
+                raise CommandError(f"Unknown scenario: {name}")
+            try:
+                mix[name] = float(weight)
+            except ValueError:
+                raise CommandError(f"Invalid weight for {name}: {weight}")
+        return {name: weight for name, weight in mix.items() if weight > 0}
+
+    def _build_scenarios(self, per_role, mix):
+        tokens = {}
+        for role in ("admin", "teacher", "student"):
+            users = User.objects.filter(role=role, is_active=True).order_by("id")[:per_role]
+            tokens[role] = [(user.id, str(AccessToken.for_user(user))) for user in users]
+            if not tokens[role]:
+                raise CommandError(f"No {role} users; seed data first.")
+
+        student_ids = [user_id for user_id, _ in tokens["student"]]
+        course_ids = list(Course.objects.values_list("id", flat=True)[:1000])
+        lessons_by_course = defaultdict(list)
+        for lesson_id, course_id in Lesson.objects.filter(
+            course_id__in=course_ids
+        ).values_list("id", "course_id"):
+            lessons_by_course[course_id].append(lesson_id)
+        enrollments = [
+            pair
+            for pair in Enrollment.objects.filter(
+                user_id__in=student_ids, course_id__in=course_ids
+            ).values_list("user_id", "course_id")
+            if pair[1] in lessons_by_course
+        ]
+
+        if not course_ids:
+            raise CommandError("No courses; seed data first.")
+        if not enrollments and ({"lessons", "complete"} & mix.keys()):
+            raise CommandError("No enrollments with lessons for the selected students.")
+        return Scenarios(tokens, course_ids, lessons_by_course, enrollments)
+
+    def _request(self, base_url, method, path, token):
+        request = urllib.request.Request(
+            base_url + path,
+            method=method,
+            data=b"" if method == "POST" else None,
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                response.read()
+                status = response.status
+        except urllib.error.HTTPError as exc:
+            status = exc.code
+        except (urllib.error.URLError, OSError):
+            status = 0
+        return status, (time.perf_counter() - started) * 1000
+
+    def _report(self, stats, wall, concurrency):
+        scenarios = {}
+        all_latencies = []
+        total_errors = 0
+        total_throttled = 0
+        for name in sorted(stats.statuses):
+            latencies = stats.latencies[name]
+            requests = len(latencies) + stats.throttled[name]
+            all_latencies.extend(latencies)
+            total_errors += stats.errors[name]
+            total_throttled += stats.throttled[name]
+            scenarios[name] = {
+                "requests": requests,
+                "throttled": stats.throttled[name],
+                "error_rate": stats.errors[name] / requests,
+                "p50_ms": percentile(latencies, 50),
+                "p90_ms": percentile(latencies, 90),
+                "p99_ms": percentile(latencies, 99),
+                "statuses": dict(stats.statuses[name]),
+            }
+        # Throughput and latency cover requests the app actually served.
+        served = len(all_latencies)
+        total = served + total_throttled
+        return {
+            "concurrency": concurrency,
+            "duration_s": wall,
+            "requests": total,
+            "throttled": total_throttled,
+            "throughput_rps": served / wall if wall else 0.0,
+            "error_rate": total_errors / total if total else 0.0,
+            "p50_ms": percentile(all_latencies, 50),
+            "p90_ms": percentile(all_latencies, 90),
+            "p99_ms": percentile(all_latencies, 99),
+            "histogram": histogram(all_latencies),
+            "scenarios": scenarios,
+        }
+
+    def _print(self, report):
+        self.stdout.write(
+            f"{report['requests']} requests in {report['duration_s']:.1f}s "
+            f"({report['throughput_rps']:.1f} req/s, concurrency {report['concurrency']}), "
+            f"errors {report['error_rate']:.2%}"
+        )
+        if report["throttled"]:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"{report['throttled']} requests throttled (429), excluded from "
+                    "latency and throughput; rerun against a server started with "
+                    "THROTTLING_ENABLED=0, or with more --users."
+                )
+            )
+        self.stdout.write(
+            f"latency p50 {report['p50_ms']:.1f}ms  p90 {report['p90_ms']:.1f}ms  "
+            f"p99 {report['p99_ms']:.1f}ms"
+        )
+        for label, count in report["histogram"].items():
+            self.stdout.write(f"  {label:>10} {count}")
+        for name, row in report["scenarios"].items():
+            self.stdout.write(
+                f"  {name:<9} {row['requests']:>7} req  p50 {row['p50_ms']:.1f}ms  "
+                f"p99 {row['p99_ms']:.1f}ms  errors {row['error_rate']:.2%}  "
+                f"throttled {row['throttled']}  {row['statuses']}"
+            )
+
+    def _compare(self, report, baseline):
+        self.stdout.write("vs baseline:")
+        for key in ("throughput_rps", "p50_ms", "p90_ms", "p99_ms", "error_rate"):
+            before, after = baseline.get(key, 0), report[key]
+            change = (after - before) / before if before else 0.0
+            self.stdout.write(f"  {key:<15} {before:10.2f} -> {after:10.2f} ({change:+.1%})")
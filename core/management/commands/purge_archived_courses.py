@@ -0,0 +1,75 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import (
+    Course,
+    Enrollment,
+    Lesson,
+    LessonProgress,
+    Material,
+    QuestionAnswer,
+)
+from core.signals import per_row_delete_receivers_disconnected
+
+
+class Command(BaseCommand):
+    help = (
+        "Hard-delete soft-deleted courses and their lessons, materials, "
+        "enrollments, progress and questions in small batches."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--older-than-days",
+            type=int,
+            default=7,
+            help="Only purge courses archived at least this many days ago.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        cutoff = timezone.now() - timedelta(days=options["older_than_days"])
+        course_ids = list(
+            Course.all_objects.filter(is_active=False, updated_at__lt=cutoff)
+            .values_list("pk", flat=True)
+        )
+
+        total = 0
+        with per_row_delete_receivers_disconnected():
+            total += self._purge(course_ids, batch_size)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Purged {len(course_ids)} archived courses ({total} rows)."
+            )
+        )
+
+    def _purge(self, course_ids, batch_size):
+        total = 0
+        for course_id in course_ids:
+            # Leaves first, so every DELETE is a bounded, cascade-free batch.
+            children = [
+                LessonProgress.objects.filter(lesson__course_id=course_id),
+                LessonProgress.objects.filter(enrollment__course_id=course_id),
+                QuestionAnswer.all_objects.filter(lesson__course_id=course_id),
+                Lesson.all_objects.filter(course_id=course_id),
+                Material.all_objects.filter(course_id=course_id),
+                Enrollment.all_objects.filter(course_id=course_id),
+            ]
+            for queryset in children:
+                total += self._delete_in_batches(queryset, batch_size)
+            total += Course.all_objects.filter(pk=course_id).delete()[0]
+        return total
+
+    def _delete_in_batches(self, queryset, batch_size):
+        deleted = 0
+        while True:
+            ids = list(queryset.values_list("pk", flat=True)[:batch_size])
+            if not ids:
+                return deleted
+            with transaction.atomic():
+                deleted += queryset.model._base_manager.filter(pk__in=ids).delete()[0]
@@ -0,0 +1,77 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from core.factories import DEFAULT_COUNTS, restore_snapshot, save_snapshot, seed
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a deterministic synthetic LMS dataset with chunked bulk inserts, "
+        "or save/restore a SQLite snapshot of it."
+    )
+
+    def add_arguments(self, parser):
+        for name, default in DEFAULT_COUNTS.items():
+            option = "--" + name.replace("_", "-")
+            parser.add_argument(option, dest=name, type=type(default), default=default)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--chunk-size", type=int, default=5000)
+        parser.add_argument("--database", default="default")
+        parser.add_argument("--snapshot", help="Save the seeded SQLite database to this file.")
+        parser.add_argument(
+            "--restore", help="Load this SQLite snapshot instead of seeding."
+        )
+        parser.add_argument(
+            "--noinput",
+            "--no-input",
+            action="store_false",
+            dest="interactive",
+            help="Restore without asking for confirmation.",
+        )
+
+    def handle(self, *args, **options):
+        using = options["database"]
+        started = time.perf_counter()
+        try:
+            if options["restore"]:
+                if not os.path.isfile(options["restore"]):
+                    raise CommandError(f"No snapshot at {options['restore']}.")
+                if options["interactive"] and not self._confirm_restore(
+                    options["restore"], using
+                ):
+                    self.stdout.write("Restore cancelled.")
+                    return
+                started = time.perf_counter()
+                restore_snapshot(options["restore"], using)
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f"Restored {options['restore']} in "
+                        f"{time.perf_counter() - started:.2f}s."
+                    )
+                )
+                return
+
+            counts = {name: options[name] for name in DEFAULT_COUNTS}
+            created = seed(counts, options["seed"], options["chunk_size"], using)
+            elapsed = time.perf_counter() - started
+            for model, total in created.items():
+                self.stdout.write(f"  {model:<15} {total}")
+            self.stdout.write(
+                self.style.SUCCESS(f"Seeded {sum(created.values())} rows in {elapsed:.2f}s.")
+            )
+            if options["snapshot"]:
+                save_snapshot(options["snapshot"], using)
+                self.stdout.write(f"Snapshot written to {options['snapshot']}.")
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+    def _confirm_restore(self, path, using):
+        name = connections[using].settings_dict["NAME"]
+        answer = input(
+            f"This will overwrite every table in the {using!r} database ({name}) "
+            f"with {path}.\nType 'yes' to continue, or 'no' to cancel: "
+        )
+        return answer == "yes"
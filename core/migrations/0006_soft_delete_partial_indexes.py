@@ -0,0 +1,51 @@
+# Generated by Django 5.2.3 on 2026-10-19 15:45
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_list_filter_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['created_at'], name='core_course_act_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['category'], name='core_course_act_cat_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='enrollment',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['user', '-updated_at'], name='core_enroll_act_user_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lesson',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['created_at'], name='core_lesson_act_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lesson',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['course'], name='core_lesson_act_course_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='material',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['created_at'], name='core_material_act_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='material',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['course'], name='core_material_act_course_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='questionanswer',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['created_at'], name='core_question_act_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='questionanswer',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['lesson'], name='core_question_act_lesson_idx'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.3 on 2026-10-19 15:48
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_paths(apps, schema_editor):
+    # Existing questions are all roots.
+    QuestionAnswer = apps.get_model('core', 'QuestionAnswer')
+    for question in QuestionAnswer._base_manager.only('pk').iterator():
+        QuestionAnswer._base_manager.filter(pk=question.pk).update(path=f'{question.pk:010d}/')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_soft_delete_partial_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='questionanswer',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='questionanswer',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='replies', to='core.questionanswer'),
+        ),
+        migrations.AddField(
+            model_name='questionanswer',
+            name='path',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=231),
+        ),
+        migrations.AddField(
+            model_name='questionanswer',
+            name='reply_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='questionanswer',
+            index=models.Index(condition=models.Q(('is_active', True), ('parent__isnull', True)), fields=['lesson', '-id'], name='core_question_roots_idx'),
+        ),
+        migrations.RunPython(backfill_paths, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 5.2.3 on 2026-10-19 15:50
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def remove_duplicate_enrollments(apps, schema_editor):
+    # Keep the oldest enrollment per (user, course) so the constraint can be added,
+    # after moving the duplicates' lesson progress onto it: deleting them would
+    # cascade to their LessonProgress rows.
+    Enrollment = apps.get_model('core', 'Enrollment')
+    LessonProgress = apps.get_model('core', 'LessonProgress')
+    duplicates = (
+        Enrollment._base_manager.values('user', 'course')
+        .annotate(total=models.Count('id'))
+        .filter(total__gt=1)
+    )
+    for row in duplicates:
+        kept, *others = Enrollment._base_manager.filter(
+            user=row['user'], course=row['course']
+        ).order_by('id')
+        kept_progress = {
+            progress.lesson_id: progress
+            for progress in LessonProgress._base_manager.filter(enrollment=kept)
+        }
+        for other in others:
+            for progress in LessonProgress._base_manager.filter(enrollment=other):
+                current = kept_progress.get(progress.lesson_id)
+                if current is None:
+                    progress.enrollment = kept
+                    progress.save(update_fields=['enrollment'])
+                    kept_progress[progress.lesson_id] = progress
+                elif progress.is_completed and not current.is_completed:
+                    current.is_completed = True
+                    current.completed_at = progress.completed_at
+                    current.save(update_fields=['is_completed', 'completed_at'])
+            kept.progress = max(kept.progress, other.progress)
+            kept.is_completed = kept.is_completed or other.is_completed
+            kept.is_active = kept.is_active or other.is_active
+        kept.save(update_fields=['progress', 'is_completed', 'is_active'])
+        Enrollment._base_manager.filter(pk__in=[other.pk for other in others]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_question_threads'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdempotencyKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=255)),
+                ('fingerprint', models.CharField(max_length=255)),
+                ('status_code', models.PositiveSmallIntegerField()),
+                ('response_body', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+        ),
+        migrations.RunPython(remove_duplicate_enrollments, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='enrollment',
+            constraint=models.UniqueConstraint(fields=('user', 'course'), name='core_enrollment_user_course_uniq'),
+        ),
+        migrations.AddField(
+            model_name='idempotencykey',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddConstraint(
+            model_name='idempotencykey',
+            constraint=models.UniqueConstraint(fields=('user', 'key'), name='core_idempotency_user_key_uniq'),
+        ),
+    ]
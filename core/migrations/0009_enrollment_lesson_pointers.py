@@ -0,0 +1,46 @@
+# Generated by Django 5.2.3 on 2026-10-19 15:56
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_pointers(apps, schema_editor):
+    Enrollment = apps.get_model('core', 'Enrollment')
+    Lesson = apps.get_model('core', 'Lesson')
+    LessonProgress = apps.get_model('core', 'LessonProgress')
+    for enrollment in Enrollment._base_manager.only('pk', 'course_id').iterator():
+        completed = LessonProgress.objects.filter(enrollment=enrollment, is_completed=True)
+        last = completed.order_by('-completed_at').values_list('lesson_id', flat=True).first()
+        next_id = (
+            Lesson._base_manager.filter(course_id=enrollment.course_id, is_active=True)
+            .exclude(id__in=completed.values('lesson_id'))
+            .order_by('id')
+            .values_list('id', flat=True)
+            .first()
+        )
+        Enrollment._base_manager.filter(pk=enrollment.pk).update(
+            last_lesson_id=last, next_lesson_id=next_id
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_enrollment_unique_idempotency'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='enrollment',
+            name='last_lesson',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='core.lesson'),
+        ),
+        migrations.AddField(
+            model_name='enrollment',
+            name='next_lesson',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='core.lesson'),
+        ),
+        migrations.RunPython(backfill_pointers, migrations.RunPython.noop),
+    ]
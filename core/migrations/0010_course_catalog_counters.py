@@ -0,0 +1,40 @@
+# Generated by Django 5.2.3 on 2026-10-19 15:58
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    Course = apps.get_model('core', 'Course')
+    for name, field in (('lesson', 'lesson_count'), ('enrollment', 'enrollment_count')):
+        counts = models.Subquery(
+            apps.get_model('core', name)._base_manager.filter(
+                course_id=models.OuterRef('pk'), is_active=True
+            )
+            .order_by()
+            .values('course_id')
+            .annotate(total=models.Count('pk'))
+            .values('total')
+        )
+        Course._base_manager.update(**{field: Coalesce(counts, 0)})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_enrollment_lesson_pointers'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='enrollment_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='lesson_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
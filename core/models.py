@@ -1,16 +1,66 @@
-from typing import override
-from django.db import models
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, router, transaction
+from django.db.models.functions import Coalesce, NullIf
 from users.models import User
 
+
+class ActiveManager(models.Manager):
+    """Default manager that hides soft-deleted (is_active=False) rows.
+
+    ``parents`` are the relations whose own soft delete hides a row as well;
+    ``visible()`` filters on them, e.g. lessons of archived courses.
+    """
+
+    def __init__(self, parents=()):
+        super().__init__()
+        self.parents = parents
+
+    def get_queryset(self):
+        return super().get_queryset().filter(is_active=True)
+
+    def visible(self):
+        return self.get_queryset().filter(
+            **{f"{parent}__is_active": True for parent in self.parents}
+        )
+
+
+class EnrollmentManager(ActiveManager):
+    def enroll(self, user, course, price, **fields):
+        """Create or reactivate an enrollment with one INSERT ... ON CONFLICT."""
+        from .access import invalidate_enrollments
+
+        if "next_lesson" not in fields:
+            lessons = Lesson.objects.filter(course=course).order_by("id")
+            fields["next_lesson_id"] = lessons.values_list("id", flat=True).first()
+        enrollment = self.model(user=user, course=course, price=price, **fields)
+        self.bulk_create(
+            [enrollment],
+            update_conflicts=True,
+            unique_fields=["user", "course"],
+            update_fields=["is_active", "updated_at"],
+        )
+        # bulk_create skips post_save, so do its bookkeeping here.
+        invalidate_enrollments(user.pk, user)
+        Course.refresh_counters(pk=course.pk)
+        return enrollment
+
+
 class Category(models.Model):
     title = models.CharField(max_length=255)
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = ActiveManager()
+    all_objects = models.Manager()
+
     def __str__(self):
         return self.title
 
+
+COUNTER_FIELDS = ("lesson_count", "enrollment_count")
+
+
 class Course(models.Model):
     title = models.CharField(max_length=255)
     description = models.TextField()
@@ -20,12 +70,62 @@ class Course(models.Model):
     is_active = models.BooleanField(default=True)
     category = models.ForeignKey(Category, on_delete=models.CASCADE)
     instructor = models.ForeignKey(User, on_delete=models.CASCADE, limit_choices_to={'role': 'teacher'})
+    # Denormalized for the catalog; kept current by core.signals and enroll().
+    lesson_count = models.PositiveIntegerField(default=0, editable=False)
+    enrollment_count = models.PositiveIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = ActiveManager()
+    all_objects = models.Manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at"]),
+            models.Index(
+                fields=["created_at"],
+                condition=models.Q(is_active=True),
+                name="core_course_act_created_idx",
+            ),
+            models.Index(
+                fields=["category"],
+                condition=models.Q(is_active=True),
+                name="core_course_act_cat_idx",
+            ),
+            models.Index(fields=["price"]),
+        ]
+
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        # The counters are only written by refresh_counters' UPDATE; a full save
+        # from a stale instance would otherwise write old counts back.
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def refresh_counters(cls, **lookups):
+        """Recount active lessons and enrollments of matching courses in one UPDATE."""
+        def active_count(model):
+            return models.Subquery(
+                model.objects.filter(course_id=models.OuterRef("pk"))
+                .order_by()
+                .values("course_id")
+                .annotate(total=models.Count("pk"))
+                .values("total")
+            )
+
+        cls.all_objects.filter(**lookups).update(
+            lesson_count=Coalesce(active_count(Lesson), 0),
+            enrollment_count=Coalesce(active_count(Enrollment), 0),
+        )
+
 class Lesson(models.Model):
     title = models.CharField(max_length=255)
     description = models.TextField()
@@ -35,6 +135,24 @@ class Lesson(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = ActiveManager(parents=("course",))
+    all_objects = models.Manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at"]),
+            models.Index(
+                fields=["created_at"],
+                condition=models.Q(is_active=True),
+                name="core_lesson_act_created_idx",
+            ),
+            models.Index(
+                fields=["course"],
+                condition=models.Q(is_active=True),
+                name="core_lesson_act_course_idx",
+            ),
+        ]
+
     def __str__(self):
         return self.title
 
@@ -48,6 +166,24 @@ class Material(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = ActiveManager(parents=("course",))
+    all_objects = models.Manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at"]),
+            models.Index(
+                fields=["created_at"],
+                condition=models.Q(is_active=True),
+                name="core_material_act_created_idx",
+            ),
+            models.Index(
+                fields=["course"],
+                condition=models.Q(is_active=True),
+                name="core_material_act_course_idx",
+            ),
+        ]
+
     def __str__(self):
         return self.title
 
@@ -62,21 +198,183 @@ class Enrollment(models.Model):
     is_completed = models.BooleanField(default=False)
     total_mark = models.FloatField(default=0)
     is_certificate_ready = models.BooleanField(default=False)
+    # "Continue learning" pointers, maintained by mark_lesson_completed and,
+    # when the course's lessons change, by refresh_progress.
+    last_lesson = models.ForeignKey(
+        'Lesson', null=True, blank=True, on_delete=models.SET_NULL, related_name='+'
+    )
+    next_lesson = models.ForeignKey(
+        'Lesson', null=True, blank=True, on_delete=models.SET_NULL, related_name='+'
+    )
     
+    objects = EnrollmentManager(parents=("course",))
+    all_objects = models.Manager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["user", "-updated_at"],
+                condition=models.Q(is_active=True),
+                name="core_enroll_act_user_idx",
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "course"], name="core_enrollment_user_course_uniq"
+            ),
+        ]
+
     def __str__(self):
         return f"{self.user.username} - {self.course.title}"
 
+    @classmethod
+    def refresh_progress(cls, **lookups):
+        """Recompute progress, next_lesson and is_completed of matching enrollments in one UPDATE.
+
+        Only active lessons count, so this must run again whenever a lesson of
+        the course is published, archived or removed.
+        """
+        done = LessonProgress.objects.filter(
+            enrollment_id=models.OuterRef("pk"), is_completed=True
+        )
+        lessons = Lesson.objects.filter(course_id=models.OuterRef("course_id"))
+        remaining = Lesson.objects.filter(course_id=models.OuterRef("course_id")).exclude(
+            pk__in=LessonProgress.objects.filter(
+                enrollment_id=models.OuterRef(models.OuterRef("pk")), is_completed=True
+            ).values("lesson_id")
+        )
+
+        def count(queryset, group_by):
+            return Coalesce(
+                models.Subquery(
+                    queryset.order_by()
+                    .values(group_by)
+                    .annotate(total=models.Count("pk"))
+                    .values("total")
+                ),
+                0,
+            )
+
+        completed = count(done.filter(lesson__is_active=True), "enrollment_id")
+        total = count(lessons, "course_id")
+        cls.all_objects.filter(**lookups).update(
+            progress=Coalesce(completed * 100 / NullIf(total, 0), 0),
+            next_lesson_id=models.Subquery(remaining.order_by("id").values("id")[:1]),
+            is_completed=models.Case(
+                models.When(models.Exists(lessons) & ~models.Exists(remaining), then=True),
+                default=False,
+            ),
+        )
+
+# Materialized path: each node appends its zero-padded pk, so a whole thread
+# is one `path__startswith` range scan and sorting by path yields tree order.
+THREAD_PATH_WIDTH = 10
+THREAD_MAX_DEPTH = 20
+
 class QuestionAnswer(models.Model):
     lesson = models.ForeignKey(Lesson, on_delete=models.CASCADE)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
+    parent = models.ForeignKey(
+        'self', null=True, blank=True, on_delete=models.CASCADE, related_name='replies'
+    )
+    path = models.CharField(
+        max_length=(THREAD_PATH_WIDTH + 1) * (THREAD_MAX_DEPTH + 1),
+        db_index=True,
+        editable=False,
+        default='',
+    )
+    depth = models.PositiveSmallIntegerField(default=0, editable=False)
+    reply_count = models.PositiveIntegerField(default=0, editable=False)
     description = models.TextField()
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = ActiveManager(parents=("lesson", "lesson__course"))
+    all_objects = models.Manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at"]),
+            models.Index(
+                fields=["created_at"],
+                condition=models.Q(is_active=True),
+                name="core_question_act_created_idx",
+            ),
+            models.Index(
+                fields=["lesson"],
+                condition=models.Q(is_active=True),
+                name="core_question_act_lesson_idx",
+            ),
+            models.Index(
+                fields=["lesson", "-id"],
+                condition=models.Q(is_active=True, parent__isnull=True),
+                name="core_question_roots_idx",
+            ),
+        ]
+
     def __str__(self):
         return f"{self.user}-->{self.lesson}-->{self.description}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remembered so save() can move the parent's reply_count on (de)activation.
+        if "is_active" in field_names:
+            instance._stored_is_active = values[field_names.index("is_active")]
+        return instance
+
+    def save(self, *args, **kwargs):
+        creating = self._state.adding
+        update_fields = kwargs.get("update_fields")
+        using = kwargs.get("using") or router.db_for_write(QuestionAnswer, instance=self)
+        with transaction.atomic(using=using):
+            was_active = None
+            if not creating and self.parent_id and (
+                update_fields is None or "is_active" in update_fields
+            ):
+                was_active = getattr(self, "_stored_is_active", None)
+                if was_active is None:
+                    was_active = QuestionAnswer.all_objects.using(using).filter(
+                        pk=self.pk
+                    ).values_list("is_active", flat=True).first()
+            super().save(*args, **kwargs)
+            if creating:
+                prefix = self.parent.path if self.parent_id else ""
+                self.path = f"{prefix}{self.pk:0{THREAD_PATH_WIDTH}d}/"
+                self.depth = self.parent.depth + 1 if self.parent_id else 0
+                QuestionAnswer.all_objects.using(using).filter(pk=self.pk).update(
+                    path=self.path, depth=self.depth
+                )
+                change = 1 if self.parent_id and self.is_active else 0
+            else:
+                change = 0 if was_active is None else int(self.is_active) - int(was_active)
+            if change:
+                QuestionAnswer.all_objects.using(using).filter(pk=self.parent_id).update(
+                    reply_count=models.F("reply_count") + change
+                )
+        self._stored_is_active = self.is_active
+
+class IdempotencyKey(models.Model):
+    """Stored response for a client-supplied Idempotency-Key on a write endpoint."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=255)
+    # Null while the first request with this key is still running.
+    status_code = models.PositiveSmallIntegerField(null=True)
+    response_body = models.JSONField(encoder=DjangoJSONEncoder, null=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "key"], name="core_idempotency_user_key_uniq"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}:{self.key}"
+
 class LessonProgress(models.Model):
     enrollment = models.ForeignKey(Enrollment, on_delete=models.CASCADE)
     lesson = models.ForeignKey(Lesson, on_delete=models.CASCADE)
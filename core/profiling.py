@@ -0,0 +1,208 @@
+import cProfile
+import io
+import json
+import pstats
+import random
+import sys
+import threading
+import time
+import uuid
+from contextlib import ExitStack
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework.exceptions import APIException
+from rest_framework.serializers import BaseSerializer
+
+HEADER = "X-Profile"
+QUERY_PARAM = "profile"
+# Python 3.12+ allows one active cProfile profiler per process; overlapping
+# requests in a threaded server skip profiling instead of failing.
+_profiler_lock = threading.Lock()
+
+
+def get_profiling_setting(name):
+    defaults = {
+        "ENABLED": False,
+        "SAMPLE_RATE": 0.0,
+        "DIRECTORY": Path(settings.BASE_DIR) / "profiles",
+        "MAX_FILES": 200,
+    }
+    return getattr(settings, "PROFILING", {}).get(name, defaults[name])
+
+
+def profile_dir():
+    return Path(get_profiling_setting("DIRECTORY"))
+
+
+class _QueryTimer:
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        # Part of ``seconds`` spent in queries that lazy querysets ran while serializing.
+        self.serializing_seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.count += 1
+            self.seconds += elapsed
+            if _inside_serialization():
+                self.serializing_seconds += elapsed
+
+
+def _inside_serialization():
+    code = BaseSerializer.data.fget.__code__
+    frame = sys._getframe(2)
+    while frame is not None:
+        if frame.f_code is code:
+            return True
+        frame = frame.f_back
+    return False
+
+
+def _serialization_seconds(stats):
+    # Every top-level .data access (single or list) goes through BaseSerializer.data
+    # exactly once, so its cumulative time is the serialization total. It includes
+    # any queries that lazy querysets run while serializing; _profile subtracts them.
+    code = BaseSerializer.data.fget.__code__
+    key = (code.co_filename, code.co_firstlineno, code.co_name)
+    entry = stats.stats.get(key)
+    return entry[3] if entry else 0.0
+
+
+class ProfilingMiddleware:
+    """Profile single requests with cProfile and store the result for download.
+
+    A request is profiled when an admin asks for it with the ``X-Profile: 1`` header
+    or ``?profile=1``, or when it falls within ``PROFILING["SAMPLE_RATE"]``. The
+    ``X-Profile-Id`` response header names the stored profile.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not get_profiling_setting("ENABLED") or not self._should_profile(request):
+            return self.get_response(request)
+        if not _profiler_lock.acquire(blocking=False):
+            return self.get_response(request)
+        try:
+            return self._profile(request)
+        finally:
+            _profiler_lock.release()
+
+    def _should_profile(self, request):
+        if request.headers.get(HEADER) == "1" or request.GET.get(QUERY_PARAM) == "1":
+            return self._is_admin(request)
+        rate = get_profiling_setting("SAMPLE_RATE")
+        return rate > 0 and random.random() < rate
+
+    def _is_admin(self, request):
+        user = getattr(request, "user", None)
+        if user is not None and user.is_authenticated:
+            return user.role == "admin"
+        try:
+            result = JWTAuthentication().authenticate(request)
+        except APIException:
+            return False
+        return result is not None and result[0].role == "admin"
+
+    def process_template_response(self, request, response):
+        # Called right before DRF renders; the callback fires right after.
+        timing = getattr(request, "_profile_timing", None)
+        if timing is not None:
+            timing["render_started"] = time.perf_counter()
+            response.add_post_render_callback(
+                lambda rendered: timing.__setitem__("render_finished", time.perf_counter())
+            )
+        return response
+
+    def _profile(self, request):
+        timing = request._profile_timing = {}
+        timers = []
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                timer = _QueryTimer()
+                timers.append(timer)
+                stack.enter_context(connection.execute_wrapper(timer))
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+        total = time.perf_counter() - started
+
+        stream = io.StringIO()
+        stats = pstats.Stats(profiler, stream=stream)
+        render = timing.get("render_finished", 0) - timing.get("render_started", 0)
+        db = sum(timer.seconds for timer in timers)
+        # Counted once, under db_ms; serialization_db_ms shows how much of it there was.
+        serialization_db = sum(timer.serializing_seconds for timer in timers)
+        serialization = max(_serialization_seconds(stats) - serialization_db, 0)
+        summary = {
+            "method": request.method,
+            "path": request.get_full_path(),
+            "status": response.status_code,
+            "created": time.time(),
+            "total_ms": total * 1000,
+            "db_ms": db * 1000,
+            "queries": sum(timer.count for timer in timers),
+            "serialization_ms": serialization * 1000,
+            "serialization_db_ms": serialization_db * 1000,
+            "render_ms": max(render, 0) * 1000,
+            "other_ms": max(total - db - serialization - max(render, 0), 0) * 1000,
+            "top": self._top_functions(stats, stream),
+        }
+        profile_id = self._store(profiler, summary)
+        response["X-Profile-Id"] = profile_id
+        return response
+
+    def _top_functions(self, stats, stream, limit=15):
+        stats.sort_stats("cumulative").print_stats(limit)
+        return stream.getvalue()
+
+    def _store(self, profiler, summary):
+        directory = profile_dir()
+        directory.mkdir(parents=True, exist_ok=True)
+        profile_id = uuid.uuid4().hex
+        summary["id"] = profile_id
+        profiler.dump_stats(directory / f"{profile_id}.prof")
+        (directory / f"{profile_id}.json").write_text(json.dumps(summary))
+        self._prune(directory)
+        return profile_id
+
+    def _prune(self, directory):
+        summaries = sorted(directory.glob("*.json"), key=lambda p: p.stat().st_mtime)
+        for stale in summaries[: max(len(summaries) - get_profiling_setting("MAX_FILES"), 0)]:
+            stale.unlink(missing_ok=True)
+            stale.with_suffix(".prof").unlink(missing_ok=True)
+
+
+def list_profiles():
+    directory = profile_dir()
+    if not directory.exists():
+        return []
+    summaries = [json.loads(path.read_text()) for path in directory.glob("*.json")]
+    for summary in summaries:
+        summary.pop("top", None)
+    return sorted(summaries, key=lambda summary: summary["created"], reverse=True)
+
+
+def load_profile(profile_id):
+    path = profile_dir() / f"{profile_id}.json"
+    if not path.exists():
+        return None
+    return json.loads(path.read_text())
+
+
+def profile_file(profile_id):
+    path = profile_dir() / f"{profile_id}.prof"
+    return path if path.exists() else None
@@ -0,0 +1,61 @@
+from users.scoping import CURRENT_USER, RoleScope
+
+from .access import get_enrolled_course_ids
+from .models import Course, Enrollment, Lesson, Material, QuestionAnswer
+
+
+class CourseScope(RoleScope):
+    # Students browse the whole catalog; teachers only see their own courses.
+    model = Course
+    rules = {
+        "admin": {},
+        "teacher": {"instructor": CURRENT_USER},
+        "student": {},
+    }
+
+
+class EnrollmentScope(RoleScope):
+    model = Enrollment
+    rules = {
+        "admin": {},
+        "teacher": {"course__instructor": CURRENT_USER},
+        "student": {"user": CURRENT_USER},
+    }
+
+
+class CourseContentScope(RoleScope):
+    # Course pages and their files: the instructor's own courses, or the ones a
+    # student is enrolled in (from the cached enrollment set, not a join).
+    model = Course
+    rules = {
+        "admin": {},
+        "teacher": {"instructor": CURRENT_USER},
+        "student": {"id__in": get_enrolled_course_ids},
+    }
+
+
+class LessonScope(RoleScope):
+    model = Lesson
+    rules = {
+        "admin": {},
+        "teacher": {"course__instructor": CURRENT_USER},
+        "student": {"course__in": get_enrolled_course_ids},
+    }
+
+
+class MaterialScope(RoleScope):
+    model = Material
+    rules = {
+        "admin": {},
+        "teacher": {"course__instructor": CURRENT_USER},
+        "student": {"course__in": get_enrolled_course_ids},
+    }
+
+
+class QuestionScope(RoleScope):
+    model = QuestionAnswer
+    rules = {
+        "admin": {},
+        "teacher": {"lesson__course__instructor": CURRENT_USER},
+        "student": {"lesson__course__in": get_enrolled_course_ids},
+    }
@@ -1,5 +1,6 @@
 from rest_framework import serializers
-from .models import Category, Course, Lesson, Material, Enrollment, QuestionAnswer, LessonProgress
+from .models import Category, Course, Lesson, Material, Enrollment, QuestionAnswer, LessonProgress, THREAD_MAX_DEPTH
+from .access import is_enrolled
 
 class CategorySerializer(serializers.ModelSerializer):
     class Meta:
@@ -7,9 +8,15 @@ class CategorySerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 class CourseSerializer(serializers.ModelSerializer):
+    # Read through select_related("category", "instructor") to avoid per-row queries.
+    category_title = serializers.CharField(source='category.title', read_only=True)
+    instructor_name = serializers.CharField(source='instructor.get_full_name', read_only=True)
+    instructor_username = serializers.CharField(source='instructor.username', read_only=True)
+
     class Meta:
         model = Course
         fields = '__all__'
+        read_only_fields = ['instructor', 'lesson_count', 'enrollment_count']
 
 class MaterialSerializer(serializers.ModelSerializer):
     class Meta:
@@ -25,11 +32,53 @@ class EnrollmentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Enrollment
         fields = '__all__'
+        read_only_fields = ['last_lesson', 'next_lesson']
+        # Duplicates are resolved by Enrollment.objects.enroll's ON CONFLICT upsert.
+        validators = []
+
+class EnrollmentProgressSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Enrollment
+        exclude = ['user', 'course']
+
+class LessonPointerSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Lesson
+        fields = ['id', 'title']
+
+class DashboardCourseSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Course
+        fields = ['id', 'title', 'banner', 'duration']
+
+class DashboardEnrollmentSerializer(serializers.ModelSerializer):
+    course = DashboardCourseSerializer(read_only=True)
+    last_lesson = LessonPointerSerializer(read_only=True)
+    next_lesson = LessonPointerSerializer(read_only=True)
+
+    class Meta:
+        model = Enrollment
+        fields = [
+            'id', 'course', 'progress', 'is_completed', 'is_certificate_ready',
+            'last_lesson', 'next_lesson', 'updated_at',
+        ]
 
 class QuestionAnswerSerializer(serializers.ModelSerializer):
     class Meta:
         model = QuestionAnswer
         fields = '__all__'
+        read_only_fields = ['path', 'depth', 'reply_count']
+
+    def validate(self, data):
+        parent = data.get('parent')
+        if parent is not None:
+            if parent.lesson_id != data['lesson'].id:
+                raise serializers.ValidationError(
+                    {"parent": "Reply must belong to the same lesson."}
+                )
+            if parent.depth + 1 > THREAD_MAX_DEPTH:
+                raise serializers.ValidationError({"parent": "Thread is too deep."})
+        return data
 
 class LessonSerializer(serializers.ModelSerializer):
     completed = serializers.SerializerMethodField()
@@ -43,13 +92,12 @@ class LessonSerializer(serializers.ModelSerializer):
         request = self.context.get('request', None)
         if request is None or not request.user.is_authenticated:
             return False
+        completed_ids = self.context.get('completed_lesson_ids')
+        if completed_ids is not None:
+            return obj.id in completed_ids
         user = request.user
-        from .models import Enrollment, LessonProgress
-        try:
-            enrollment = Enrollment.objects.get(user=user, course=obj.course)
-            progress = LessonProgress.objects.filter(
-                enrollment=enrollment, lesson=obj, is_completed=True
-            ).exists()
-            return progress
-        except Enrollment.DoesNotExist:
-            return False
\ No newline at end of file
+        if not is_enrolled(user, obj.course_id):
+            return False
+        return LessonProgress.objects.filter(
+            enrollment__user=user, lesson=obj, is_completed=True
+        ).exists()
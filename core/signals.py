@@ -0,0 +1,131 @@
+from contextlib import contextmanager
+from functools import partial
+
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .access import invalidate_enrollments
+from .events import lesson_channel, publish, user_channel
+from .models import Course, Enrollment, Lesson, LessonProgress, QuestionAnswer
+
+
+def publish_on_commit(channel, event_type, data):
+    transaction.on_commit(partial(publish, channel, event_type, data))
+
+
+@receiver(post_save, sender=Enrollment)
+@receiver(post_delete, sender=Enrollment)
+def enrollment_changed(sender, instance, update_fields=None, **kwargs):
+    # Progress and pointer saves leave the set of enrolled courses as it was.
+    if update_fields is not None and not {"is_active", "course", "user"} & set(update_fields):
+        return
+    invalidate_enrollments(instance.user_id)
+
+
+@receiver(post_save, sender=Lesson)
+@receiver(post_delete, sender=Lesson)
+@receiver(post_save, sender=Enrollment)
+@receiver(post_delete, sender=Enrollment)
+def course_counters_changed(sender, instance, update_fields=None, **kwargs):
+    # Progress-only saves cannot change the counts.
+    if update_fields is not None and not {"is_active", "course"} & set(update_fields):
+        return
+    # Archived courses are not listed; their counts are refreshed on restore.
+    Course.refresh_counters(pk=instance.course_id, is_active=True)
+
+
+@receiver(post_save, sender=Lesson)
+@receiver(post_delete, sender=Lesson)
+def course_lessons_changed(sender, instance, update_fields=None, **kwargs):
+    # A published or archived lesson moves every learner's progress and pointers.
+    if update_fields is not None and not {"is_active", "course"} & set(update_fields):
+        return
+    Enrollment.refresh_progress(course_id=instance.course_id)
+
+
+@receiver(post_save, sender=Course)
+def course_saved(sender, instance, created, update_fields=None, **kwargs):
+    # Counts are not kept while a course is archived; catch up when it is restored.
+    if created or not instance.is_active:
+        return
+    if update_fields is None or "is_active" in update_fields:
+        Course.refresh_counters(pk=instance.pk)
+
+
+@receiver(post_save, sender=Enrollment)
+def enrollment_saved(sender, instance, **kwargs):
+    publish_on_commit(
+        user_channel(instance.user_id),
+        "enrollment",
+        {
+            "id": instance.id,
+            "course": instance.course_id,
+            "progress": instance.progress,
+            "is_completed": instance.is_completed,
+        },
+    )
+
+
+@receiver(post_save, sender=LessonProgress)
+def lesson_progress_saved(sender, instance, **kwargs):
+    if not instance.is_completed:
+        return
+    publish_on_commit(
+        user_channel(instance.enrollment.user_id),
+        "lesson_progress",
+        {
+            "enrollment": instance.enrollment_id,
+            "lesson": instance.lesson_id,
+            "is_completed": instance.is_completed,
+        },
+    )
+
+
+@receiver(post_save, sender=QuestionAnswer)
+def question_saved(sender, instance, created, **kwargs):
+    if not created:
+        return
+    data = {
+        "id": instance.id,
+        "lesson": instance.lesson_id,
+        "parent": instance.parent_id,
+        "user": instance.user_id,
+        "description": instance.description,
+    }
+    publish_on_commit(lesson_channel(instance.lesson_id), "question", data)
+    if instance.parent_id and instance.parent.user_id != instance.user_id:
+        publish_on_commit(user_channel(instance.parent.user_id), "reply", data)
+
+
+@receiver(post_delete, sender=QuestionAnswer)
+def question_deleted(sender, instance, **kwargs):
+    # Archived replies were already taken off the count when deactivated.
+    if instance.parent_id and instance.is_active:
+        QuestionAnswer.all_objects.filter(pk=instance.parent_id).update(
+            reply_count=F("reply_count") - 1
+        )
+
+
+@contextmanager
+def per_row_delete_receivers_disconnected():
+    """Let purges of whole archived courses use Django's fast delete.
+
+    Any post_delete receiver forces the collector to load and signal row by row;
+    for a course being removed, none of these receivers has anything to do.
+    """
+    receivers = [
+        (enrollment_changed, Enrollment),
+        (course_counters_changed, Lesson),
+        (course_lessons_changed, Lesson),
+        (course_counters_changed, Enrollment),
+        (question_deleted, QuestionAnswer),
+    ]
+    for receiver_func, sender in receivers:
+        post_delete.disconnect(receiver_func, sender=sender)
+    try:
+        yield
+    finally:
+        for receiver_func, sender in receivers:
+            post_delete.connect(receiver_func, sender=sender)
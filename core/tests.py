@@ -1,3 +1,753 @@
-from django.test import TestCase
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import warnings
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import DatabaseError, transaction
+from django.db.models import QuerySet
+from django.test import AsyncClient, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from users.models import User
+
+from .delivery import _parse_range
+from .events import InProcessBroker, user_channel
+from .factories import save_snapshot, seed
+from .models import (
+    Category,
+    Course,
+    Enrollment,
+    IdempotencyKey,
+    Lesson,
+    LessonProgress,
+    Material,
+    QuestionAnswer,
+)
+from .profiling import _profiler_lock, load_profile
+from .throttling import parse_rate, take_token
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+class LMSTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user(username="teacher", password="pw", role="teacher")
+        cls.student = User.objects.create_user(username="student", password="pw", role="student")
+        cls.outsider = User.objects.create_user(username="outsider", password="pw", role="student")
+        category = Category.objects.create(title="Category")
+        cls.course = Course.objects.create(
+            title="Course",
+            description="Course",
+            price=10,
+            duration=1,
+            category=category,
+            instructor=cls.teacher,
+        )
+        cls.lesson = Lesson.objects.create(
+            course=cls.course, title="Lesson", description="Lesson", video="videos/intro.mp4"
+        )
+        Enrollment.objects.enroll(user=cls.student, course=cls.course, price=cls.course.price)
+
+    def setUp(self):
+        cache.clear()
+        caches["throttle"].clear()
+
+    def client_for(self, user):
+        client = APIClient()
+        # A fresh instance per client, so no per-request memoization leaks between tests.
+        client.force_authenticate(User.objects.get(pk=user.pk))
+        return client
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, MEDIA_DELIVERY={"BACKEND": "django"})
+class SignedMediaTests(LMSTestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.material = Material.objects.create(
+            course=cls.course, title="Notes", description="Notes", file="materials/notes.pdf"
+        )
+
+    def setUp(self):
+        super().setUp()
+        for name, body in (("videos/intro.mp4", b"video-bytes"), ("materials/notes.pdf", b"pdf")):
+            path = os.path.join(MEDIA_ROOT, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as fh:
+                fh.write(body)
+
+    def assert_signed_download(self, url, body):
+        response = self.client_for(self.student).get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNotNone(response.data["expires"])
+        download = self.client.get(response.data["url"])
+        self.assertEqual(download.status_code, 200)
+        self.assertEqual(b"".join(download.streaming_content), body)
+
+    def test_lesson_video(self):
+        self.assert_signed_download(
+            reverse("lesson-video", args=[self.lesson.pk]), b"video-bytes"
+        )
+
+    def test_material_download(self):
+        self.assert_signed_download(
+            reverse("material-download", args=[self.material.pk]), b"pdf"
+        )
+
+    def test_not_enrolled(self):
+        client = self.client_for(self.outsider)
+        self.assertEqual(
+            client.get(reverse("lesson-video", args=[self.lesson.pk])).status_code, 404
+        )
+        self.assertEqual(
+            client.get(reverse("material-download", args=[self.material.pk])).status_code, 404
+        )
+
+    def test_range_requests(self):
+        url = self.client_for(self.student).get(
+            reverse("lesson-video", args=[self.lesson.pk])
+        ).data["url"]
+        partial = self.client.get(url, HTTP_RANGE="bytes=0-4")
+        self.assertEqual(partial.status_code, 206)
+        self.assertEqual(b"".join(partial.streaming_content), b"video")
+        ignored = self.client.get(url, HTTP_RANGE="bytes=0-1,3-4")
+        self.assertEqual(ignored.status_code, 200)
+        self.assertEqual(b"".join(ignored.streaming_content), b"video-bytes")
+        self.assertEqual(self.client.get(url, HTTP_RANGE="bytes=50-").status_code, 416)
+
+    def test_tampered_signature(self):
+        url = self.client_for(self.student).get(
+            reverse("lesson-video", args=[self.lesson.pk])
+        ).data["url"]
+        self.assertEqual(self.client.get(url.replace("signature=", "signature=0")).status_code, 404)
+
+
+class EventStreamTests(LMSTestCase):
+    def test_rejected_over_wsgi(self):
+        response = self.client_for(self.student).get(reverse("event-stream"))
+        self.assertEqual(response.status_code, 501)
+
+    def test_publish_skips_closed_loops(self):
+        broker = InProcessBroker()
+
+        async def subscribe():
+            return broker.subscribe([user_channel(self.student.pk)])
+
+        subscription = asyncio.run(subscribe())
+        broker.publish(user_channel(self.student.pk), {"type": "ping", "data": {}})
+        self.assertNotIn(subscription, broker._subscribers.get(user_channel(self.student.pk), ()))
+
+
+class AsgiEventStreamTests(TransactionTestCase):
+    # The view reads the user in a worker thread, which cannot see a TestCase transaction.
+    def test_streams_over_asgi(self):
+        student = User.objects.create_user(username="student", password="pw", role="student")
+        token = str(AccessToken.for_user(student))
+
+        async def first_chunk():
+            response = await AsyncClient().get(reverse("event-stream"), {"token": token})
+            stream = aiter(response.streaming_content)
+            try:
+                return response.status_code, await anext(stream)
+            finally:
+                await stream.aclose()
+
+        status, chunk = asyncio.run(first_chunk())
+        self.assertEqual(status, 200)
+        self.assertEqual(chunk, b": connected\n\n")
+
+
+class ThrottleTests(LMSTestCase):
+    def test_sustained_client_held_to_rate(self):
+        capacity, refill_rate = parse_rate("60/min:20")
+        cache = LocMemCache("throttle-tests", {})
+        clock = [1_000_000.0]
+        admitted = 0
+        with mock.patch("time.time", lambda: clock[0]):
+            for step in range(6000):  # 10 req/s for 10 minutes
+                clock[0] = 1_000_000.0 + step / 10
+                admitted += take_token("sustained", capacity, refill_rate, cache=cache)[0]
+        self.assertLessEqual(admitted, capacity + 600)
+
+    @override_settings(THROTTLING={"RATES": {"enroll": {"student": "2/min"}}})
+    def test_enroll_throttled(self):
+        client = self.client_for(self.outsider)
+        url = reverse("enroll-course", args=[self.course.pk])
+        statuses = [client.post(url).status_code for _ in range(3)]
+        self.assertEqual(statuses, [201, 200, 429])
+
+
+class EnrollmentCacheTests(LMSTestCase):
+    def test_other_workers_cached_sets_are_not_reused(self):
+        client = self.client_for(self.outsider)
+        bundle = reverse("course-bundle", args=[self.course.pk])
+        self.assertEqual(client.get(bundle).status_code, 404)
+        # Nothing deletes the cached set, as on another worker's cache; the
+        # bumped enrollment_version alone must retire it.
+        Enrollment.objects.enroll(
+            user=User.objects.get(pk=self.outsider.pk), course=self.course, price=0
+        )
+        self.assertEqual(self.client_for(self.outsider).get(bundle).status_code, 200)
+
+        enrollment = Enrollment.objects.get(user=self.outsider, course=self.course)
+        enrollment.is_active = False
+        enrollment.save()
+        self.assertEqual(self.client_for(self.outsider).get(bundle).status_code, 404)
+
+    def test_progress_saves_keep_cached_set(self):
+        version = User.objects.get(pk=self.student.pk).enrollment_version
+        self.client_for(self.student).post(
+            reverse("mark-lesson-completed", args=[self.lesson.pk])
+        )
+        self.assertEqual(User.objects.get(pk=self.student.pk).enrollment_version, version)
+
+    def test_not_enrolled(self):
+        client = self.client_for(self.outsider)
+        self.assertEqual(
+            client.get(reverse("course-bundle", args=[self.course.pk])).status_code, 404
+        )
+
+
+class CourseBundleTests(LMSTestCase):
+    def test_constant_queries(self):
+        lessons = [self.lesson] + [
+            Lesson.objects.create(
+                course=self.course, title=f"L{n}", description="L", video=f"videos/{n}.mp4"
+            )
+            for n in range(3)
+        ]
+        for n in range(3):
+            Material.objects.create(
+                course=self.course, title=f"M{n}", description="M",
+                file=f"materials/{n}.pdf", file_type="pdf",
+            )
+        self.client_for(self.student).post(
+            reverse("mark-lesson-completed", args=[lessons[1].pk])
+        )
+        cache.clear()
+
+        client = self.client_for(self.student)
+        # Enrolled course ids, course, lessons, materials, enrollment, completed ids.
+        with self.assertNumQueries(6):
+            response = client.get(reverse("course-bundle", args=[self.course.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(row["id"], row["completed"]) for row in response.data["lessons"]],
+            [(lesson.pk, lesson is lessons[1]) for lesson in lessons],
+        )
+        self.assertEqual(len(response.data["materials"]), 3)
+        self.assertEqual(response.data["enrollment"]["progress"], 25)
+
+
+class LessonProgressTests(LMSTestCase):
+    def test_progress_ignores_inactive_lessons(self):
+        second = Lesson.objects.create(
+            course=self.course, title="Second", description="Second", video="videos/2.mp4"
+        )
+        client = self.client_for(self.student)
+        for lesson in (self.lesson, second):
+            client.post(reverse("mark-lesson-completed", args=[lesson.pk]))
+        second.is_active = False
+        second.save()
+        Lesson.objects.create(
+            course=self.course, title="Third", description="Third", video="videos/3.mp4"
+        )
+        client.post(reverse("mark-lesson-completed", args=[self.lesson.pk]))
+        enrollment = Enrollment.objects.get(user=self.student, course=self.course)
+        self.assertEqual(enrollment.progress, 50)
+
+    def test_lesson_changes_refresh_pointers(self):
+        client = self.client_for(self.student)
+        client.post(reverse("mark-lesson-completed", args=[self.lesson.pk]))
+        enrollment = Enrollment.objects.get(user=self.student, course=self.course)
+        self.assertEqual((enrollment.progress, enrollment.is_completed), (100, True))
+
+        second = Lesson.objects.create(
+            course=self.course, title="Second", description="Second", video="videos/2.mp4"
+        )
+        enrollment.refresh_from_db()
+        self.assertEqual(
+            (enrollment.progress, enrollment.next_lesson_id, enrollment.is_completed),
+            (50, second.pk, False),
+        )
+
+        second.is_active = False
+        second.save()
+        enrollment.refresh_from_db()
+        self.assertEqual(
+            (enrollment.progress, enrollment.next_lesson_id, enrollment.is_completed),
+            (100, None, True),
+        )
+
+
+class ArchivedCourseTests(LMSTestCase):
+    def setUp(self):
+        super().setUp()
+        self.question = QuestionAnswer.objects.create(
+            lesson=self.lesson, user=self.student, description="Q"
+        )
+        response = self.client_for(self.teacher).delete(
+            reverse("course-detail", args=[self.course.pk])
+        )
+        self.assertEqual(response.status_code, 204)
+
+    def test_hidden_from_students(self):
+        client = self.client_for(self.student)
+        self.assertEqual(
+            client.post(reverse("mark-lesson-completed", args=[self.lesson.pk])).status_code,
+            404,
+        )
+        self.assertEqual(
+            client.get(reverse("lesson-video", args=[self.lesson.pk])).status_code, 404
+        )
+        self.assertEqual(client.get(reverse("student-dashboard")).data, [])
+        response = client.get(reverse("lesson-questions", args=[self.lesson.pk]))
+        self.assertEqual(response.data["results"], [])
+        response = client.get(reverse("question-thread", args=[self.question.pk]))
+        self.assertEqual(response.status_code, 404)
+        response = client.get(reverse("question-list-create"))
+        self.assertEqual(response.data["results"], [])
+
+    def test_visible_in_admin(self):
+        admin_user = User.objects.create_superuser(
+            username="root", password="pw", email="root@example.com", role="admin"
+        )
+        self.client.force_login(admin_user)
+        response = self.client.get(reverse("admin:core_course_change", args=[self.course.pk]))
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(reverse("admin:core_lesson_change", args=[self.lesson.pk]))
+        self.assertContains(response, f'<option value="{self.course.pk}" selected>')
+
+
+class CourseCounterTests(LMSTestCase):
+    def counts(self):
+        course = Course.all_objects.get(pk=self.course.pk)
+        return course.lesson_count, course.enrollment_count
+
+    def test_counts_follow_lessons_and_enrollments(self):
+        self.assertEqual(self.counts(), (1, 1))
+        lesson = Lesson.objects.create(
+            course=self.course, title="Second", description="Second", video="videos/b.mp4"
+        )
+        Enrollment.objects.enroll(user=self.outsider, course=self.course, price=self.course.price)
+        self.assertEqual(self.counts(), (2, 2))
+        lesson.is_active = False
+        lesson.save()
+        self.assertEqual(self.counts(), (1, 2))
+
+    def test_full_save_keeps_counts(self):
+        stale = Course.objects.get(pk=self.course.pk)
+        Lesson.objects.create(
+            course=self.course, title="Second", description="Second", video="videos/b.mp4"
+        )
+        stale.title = "Renamed"
+        stale.save()
+        self.assertEqual(self.counts(), (2, 1))
+
+    def test_restore_recounts(self):
+        course = Course.objects.get(pk=self.course.pk)
+        course.is_active = False
+        course.save()
+        Lesson.objects.create(
+            course=self.course, title="Second", description="Second", video="videos/b.mp4"
+        )
+        self.assertEqual(self.counts(), (1, 1))
+        course.is_active = True
+        course.save()
+        self.assertEqual(self.counts(), (2, 1))
+
+    def test_purge_skips_per_row_receivers(self):
+        Course.objects.filter(pk=self.course.pk).update(is_active=False)
+        with mock.patch.object(Course, "refresh_counters") as refresh:
+            call_command("purge_archived_courses", older_than_days=0, stdout=StringIO())
+        refresh.assert_not_called()
+        self.assertFalse(Course.all_objects.filter(pk=self.course.pk).exists())
+        self.assertFalse(Lesson.all_objects.filter(pk=self.lesson.pk).exists())
+
+
+class ContentScopeTests(LMSTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        other_teacher = User.objects.create_user(
+            username="other", password="pw", role="teacher"
+        )
+        cls.other_course = Course.objects.create(
+            title="Other",
+            description="Other",
+            price=10,
+            duration=1,
+            category=cls.course.category,
+            instructor=other_teacher,
+        )
+        cls.other_lesson = Lesson.objects.create(
+            course=cls.other_course, title="Other", description="Other", video="videos/o.mp4"
+        )
+        QuestionAnswer.objects.create(lesson=cls.lesson, user=cls.student, description="Q")
+        QuestionAnswer.objects.create(
+            lesson=cls.other_lesson, user=cls.outsider, description="Q"
+        )
+
+    def lesson_ids(self, user):
+        response = self.client_for(user).get(reverse("lesson-list-create"))
+        return {row["id"] for row in response.data["results"]}
+
+    def question_lessons(self, user):
+        response = self.client_for(user).get(reverse("question-list-create"))
+        return {row["lesson"] for row in response.data["results"]}
+
+    def test_lists_follow_role_rules(self):
+        both = {self.lesson.pk, self.other_lesson.pk}
+        self.assertEqual(self.lesson_ids(self.student), {self.lesson.pk})
+        self.assertEqual(self.lesson_ids(self.teacher), {self.lesson.pk})
+        self.assertEqual(self.lesson_ids(self.outsider), set())
+        self.assertEqual(self.question_lessons(self.student), {self.lesson.pk})
+        self.assertEqual(self.question_lessons(self.outsider), set())
+        admin_user = User.objects.create_user(username="admin", password="pw", role="admin")
+        self.assertEqual(self.lesson_ids(admin_user), both)
+
+    def test_superuser_without_role_is_admin(self):
+        root = User.objects.create_superuser(
+            username="root", password="pw", email="root@example.com"
+        )
+        self.assertEqual(root.role, "")
+        self.assertEqual(
+            self.lesson_ids(root), {self.lesson.pk, self.other_lesson.pk}
+        )
+        self.assertEqual(
+            self.client_for(root)
+            .get(reverse("course-bundle", args=[self.other_course.pk]))
+            .status_code,
+            200,
+        )
+
+    def test_unknown_role_denied(self):
+        nobody = User.objects.create_user(username="nobody", password="pw")
+        response = self.client_for(nobody).get(reverse("lesson-list-create"))
+        self.assertEqual(response.status_code, 403)
+
+
+class ListFilterTests(LMSTestCase):
+    def test_out_of_range_int(self):
+        response = self.client_for(self.student).get(
+            reverse("lesson-list-create"), {"course": "9" * 23}
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("course", response.data)
+
+    def test_timestamps_are_aware(self):
+        client = self.client_for(self.student)
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", RuntimeWarning)
+            for value in ("2024-01-01", "2024-01-01T10:00:00"):
+                response = client.get(reverse("lesson-list-create"), {"created_after": value})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.data["count"], 1)
+
+
+class ProfilingTests(LMSTestCase):
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        overrides = override_settings(
+            PROFILING={"ENABLED": True, "SAMPLE_RATE": 1.0, "DIRECTORY": self.directory}
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+    def test_serialization_queries_counted_once(self):
+        # LessonSerializer.get_completed queries per lesson while serializing.
+        response = self.client_for(self.student).get(reverse("lesson-list-create"))
+        summary = load_profile(response["X-Profile-Id"])
+        self.assertGreater(summary["serialization_db_ms"], 0)
+        parts = ("db_ms", "serialization_ms", "render_ms", "other_ms")
+        self.assertLessEqual(sum(summary[part] for part in parts), summary["total_ms"] + 0.01)
+
+    def test_skips_while_another_request_is_profiled(self):
+        with _profiler_lock:
+            response = self.client_for(self.student).get(reverse("lesson-list-create"))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("X-Profile-Id", response)
+
+
+SEED_COUNTS = {
+    "categories": 2,
+    "admins": 1,
+    "teachers": 2,
+    "students": 6,
+    "courses": 4,
+    "lessons_per_course": 4,
+    "materials_per_course": 2,
+    "enrollments_per_student": 2,
+    "progress_ratio": 0.5,
+}
+
+
+class SeederTests(TestCase):
+    def seeded(self, seed_value):
+        """Seed, read back what was generated, and roll it all back."""
+        with transaction.atomic():
+            created = seed(SEED_COUNTS, seed_value, chunk_size=5)
+            rows = (
+                list(
+                    Course.objects.order_by("id").values_list(
+                        "title", "price", "duration", "category_id", "instructor_id",
+                        "lesson_count", "enrollment_count",
+                    )
+                ),
+                list(
+                    Enrollment.objects.order_by("id").values_list(
+                        "user_id", "course_id", "progress", "last_lesson_id", "next_lesson_id"
+                    )
+                ),
+            )
+            transaction.set_rollback(True)
+        return created, rows
+
+    def test_counts(self):
+        created, (courses, enrollments) = self.seeded(0)
+        self.assertEqual(
+            created,
+            {
+                "User": 9,
+                "Category": 2,
+                "Course": 4,
+                "Lesson": 16,
+                "Material": 8,
+                "Enrollment": 12,
+                "LessonProgress": 24,
+            },
+        )
+        self.assertEqual(sum(row[5] for row in courses), 16)
+        self.assertEqual(sum(row[6] for row in courses), 12)
+        self.assertEqual({row[2] for row in enrollments}, {50})
+
+    def test_deterministic(self):
+        self.assertEqual(self.seeded(3), self.seeded(3))
+        self.assertNotEqual(self.seeded(3)[1], self.seeded(4)[1])
+
+
+class SnapshotTests(TransactionTestCase):
+    def setUp(self):
+        seed(SEED_COUNTS, 0)
+        handle, self.path = tempfile.mkstemp(suffix=".sqlite3")
+        os.close(handle)
+        self.addCleanup(os.remove, self.path)
+        save_snapshot(self.path)
+        Course.all_objects.all().delete()
+
+    def restore(self, **options):
+        call_command("seed_lms", restore=self.path, stdout=StringIO(), **options)
+
+    def test_restore_noinput(self):
+        self.restore(interactive=False)
+        self.assertEqual(Course.all_objects.count(), 4)
+        self.assertEqual(LessonProgress.objects.count(), 24)
+
+    def test_restore_asks_first(self):
+        with mock.patch("builtins.input", return_value="no"):
+            self.restore()
+        self.assertEqual(Course.all_objects.count(), 0)
+        with mock.patch("builtins.input", return_value="yes"):
+            self.restore()
+        self.assertEqual(Course.all_objects.count(), 4)
+
+
+class ImportBudgetTests(SimpleTestCase):
+    def test_wsgi_import_within_budget(self):
+        with tempfile.NamedTemporaryFile(suffix=".json") as output:
+            # Raises CommandError when the median exceeds IMPORT_TIME_BUDGET_MS.
+            call_command("import_report", runs=1, output=output.name, stdout=StringIO())
+            report = json.load(output)
+        self.assertEqual(report["budget_ms"], settings.IMPORT_TIME_BUDGET_MS)
+        self.assertLessEqual(report["median_ms"], settings.IMPORT_TIME_BUDGET_MS)
+
+
+class RangeHeaderTests(SimpleTestCase):
+    def test_parse_range(self):
+        cases = {
+            None: None,
+            "bytes=0-3": (0, 3),
+            "bytes=4-": (4, 9),
+            "bytes=-3": (7, 9),
+            "bytes=5-100": (5, 9),
+            # Ignored: malformed, multi-range or reversed.
+            "items=0-3": None,
+            "bytes=0-1,4-5": None,
+            "bytes=-": None,
+            "bytes=5-2": None,
+        }
+        for header, expected in cases.items():
+            with self.subTest(header=header):
+                self.assertEqual(_parse_range(header, 10), expected)
+
+    def test_unsatisfiable(self):
+        for header in ("bytes=10-", "bytes=20-30", "bytes=-0"):
+            with self.subTest(header=header), self.assertRaises(ValueError):
+                _parse_range(header, 10)
+
+
+class QuestionThreadTests(LMSTestCase):
+    def setUp(self):
+        super().setUp()
+        self.root = QuestionAnswer.objects.create(
+            lesson=self.lesson, user=self.student, description="Q"
+        )
+
+    def reply_count(self):
+        return QuestionAnswer.all_objects.get(pk=self.root.pk).reply_count
+
+    def test_create_is_atomic(self):
+        with mock.patch.object(QuerySet, "update", side_effect=DatabaseError), \
+                self.assertRaises(DatabaseError):
+            QuestionAnswer.objects.create(
+                lesson=self.lesson, user=self.student, description="R", parent=self.root
+            )
+        self.assertFalse(QuestionAnswer.all_objects.filter(path="").exists())
+        self.assertEqual(QuestionAnswer.all_objects.count(), 1)
+
+    def test_reply_count_follows_soft_delete(self):
+        reply = QuestionAnswer.objects.create(
+            lesson=self.lesson, user=self.teacher, description="A", parent=self.root
+        )
+        self.assertEqual(self.reply_count(), 1)
+        reply.is_active = False
+        reply.save()
+        self.assertEqual(self.reply_count(), 0)
+        reply = QuestionAnswer.all_objects.get(pk=reply.pk)
+        reply.is_active = True
+        reply.save(update_fields=["is_active", "updated_at"])
+        self.assertEqual(self.reply_count(), 1)
+        reply.is_active = False
+        reply.save()
+        reply.delete()
+        self.assertEqual(self.reply_count(), 0)
+
+    def reply(self, parent, description):
+        return QuestionAnswer.objects.create(
+            lesson=self.lesson, user=self.teacher, description=description, parent=parent
+        )
+
+    def test_thread_nesting(self):
+        first = self.reply(self.root, "A")
+        nested = self.reply(first, "A1")
+        second = self.reply(self.root, "B")
+        self.reply(nested, "A1a")
+        archived = self.reply(second, "gone")
+        archived.is_active = False
+        archived.save()
+
+        response = self.client_for(self.student).get(
+            reverse("question-thread", args=[self.root.pk])
+        )
+
+        def shape(node):
+            return (node["description"], [shape(child) for child in node["replies"]])
+
+        self.assertEqual(
+            shape(response.data),
+            ("Q", [("A", [("A1", [("A1a", [])])]), ("B", [])]),
+        )
+
+    def test_lesson_questions_keyset_pages(self):
+        roots = [self.root] + [
+            QuestionAnswer.objects.create(
+                lesson=self.lesson, user=self.student, description=f"Q{n}"
+            )
+            for n in range(6)
+        ]
+        self.reply(roots[-1], "reply")
+        client = self.client_for(self.student)
+
+        seen = []
+        url = reverse("lesson-questions", args=[self.lesson.pk]) + "?limit=3"
+        while url:
+            page = client.get(url).data
+            seen += [row["id"] for row in page["results"]]
+            if len(seen) == 3:
+                # A question posted mid-scroll must not shift the later pages.
+                QuestionAnswer.objects.create(
+                    lesson=self.lesson, user=self.student, description="late"
+                )
+            url = page["next"]
+        self.assertEqual(seen, [root.pk for root in reversed(roots)])
+
+
+class IdempotencyTests(LMSTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.other_course = Course.objects.create(
+            title="Other",
+            description="Other",
+            price=5,
+            duration=1,
+            category=cls.course.category,
+            instructor=cls.teacher,
+        )
+
+    def enroll(self, course, key="key-1"):
+        return self.client_for(self.outsider).post(
+            reverse("enrollment-list-create"),
+            {"user": self.outsider.pk, "course_id": course.pk, "price": 1},
+            format="json",
+            HTTP_IDEMPOTENCY_KEY=key,
+        )
+
+    def test_replay(self):
+        first = self.enroll(self.course)
+        self.assertEqual(first.status_code, 201)
+        second = self.enroll(self.course)
+        self.assertEqual(second.status_code, 201)
+        self.assertEqual(second["Idempotent-Replayed"], "true")
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(Enrollment.objects.filter(user=self.outsider).count(), 1)
+
+    def test_reuse_with_different_body(self):
+        self.assertEqual(self.enroll(self.course).status_code, 201)
+        response = self.enroll(self.other_course)
+        self.assertEqual(response.status_code, 422)
+        self.assertFalse(is_enrolled_in_db(self.outsider, self.other_course))
+
+    def test_reuse_on_other_endpoint(self):
+        self.assertEqual(self.enroll(self.course).status_code, 201)
+        response = self.client_for(self.outsider).post(
+            reverse("enroll-course", args=[self.other_course.pk]), HTTP_IDEMPOTENCY_KEY="key-1"
+        )
+        self.assertEqual(response.status_code, 422)
+
+    def test_in_flight_duplicate(self):
+        # The first request's reservation: no response stored yet.
+        IdempotencyKey.objects.create(user=self.outsider, key="key-1", fingerprint="x")
+        with mock.patch("core.idempotency._fingerprint", return_value="x"):
+            response = self.enroll(self.course)
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(is_enrolled_in_db(self.outsider, self.course))
+
+    def test_server_error_releases_key(self):
+        with mock.patch.object(Enrollment.objects, "enroll", side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.enroll(self.course)
+        self.assertFalse(IdempotencyKey.objects.exists())
+        self.assertEqual(self.enroll(self.course).status_code, 201)
+
+
+def is_enrolled_in_db(user, course):
+    return Enrollment.objects.filter(user=user, course=course).exists()
@@ -0,0 +1,134 @@
+"""Per-role, per-endpoint token-bucket throttles backed by the Django cache.
+
+Each bucket is two cache keys: when it last started filling from full and how
+many tokens were taken since. Taking a token is one ``get_many``, one atomic
+``incr`` and a ``touch`` per key. A request is allowed while
+``taken - rate * elapsed <= capacity``. Once that difference drops to zero the
+bucket is full again, so the state is reset; every take pushes the keys' expiry
+to just past that point, never earlier.
+"""
+
+import math
+import time
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+
+ANONYMOUS = "anonymous"
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def get_throttle_setting(name):
+    defaults = {
+        "ENABLED": True,
+        "CACHE": "default",
+        "RATES": {},
+    }
+    return getattr(settings, "THROTTLING", {}).get(name, defaults[name])
+
+
+@lru_cache(maxsize=None)
+def parse_rate(rate):
+    """``"30/min"`` -> ``(30, 0.5)``: capacity, and tokens refilled per second.
+
+    ``"30/min:60"`` keeps the refill rate but allows bursts of up to 60.
+    """
+    if rate is None:
+        return None
+    rate, _, burst = rate.partition(":")
+    count, _, period = rate.partition("/")
+    count = int(count)
+    capacity = int(burst) if burst else count
+    return capacity, count / PERIODS[period[0]]
+
+
+def get_rate(scope, role):
+    rates = get_throttle_setting("RATES").get(scope, {})
+    return parse_rate(rates.get(role, rates.get("default")))
+
+
+def take_token(key, capacity, refill_rate, now=None, cache=None):
+    """Take one token from the bucket at ``key``; return ``(allowed, wait_seconds)``."""
+    cache = cache or caches[get_throttle_setting("CACHE")]
+    now = time.time() if now is None else now
+    started_key, taken_key = f"{key}:t", f"{key}:n"
+    state = cache.get_many([started_key, taken_key])
+    started, taken = state.get(started_key), state.get(taken_key)
+
+    if started is None or taken is None or taken <= refill_rate * (now - started):
+        # Full bucket: restart it with this request's token. Concurrent restarts
+        # can each admit one request, only while the bucket is full anyway.
+        cache.set_many({started_key: now, taken_key: 1}, _refill_timeout(1, refill_rate))
+        return True, 0.0
+    try:
+        taken = cache.incr(taken_key)
+    except ValueError:
+        # Expired between the read and the increment: the bucket is full.
+        return take_token(key, capacity, refill_rate, now, cache)
+
+    debt = taken - refill_rate * (now - started)
+    if debt <= capacity:
+        # incr keeps the old expiry; without this the keys could expire while the
+        # bucket is still nearly empty and hand the client a fresh burst.
+        timeout = _refill_timeout(debt, refill_rate)
+        cache.touch(started_key, timeout)
+        cache.touch(taken_key, timeout)
+        return True, 0.0
+    # Rejected requests do not consume a token.
+    cache.decr(taken_key)
+    return False, (debt - capacity) / refill_rate
+
+
+def _refill_timeout(debt, refill_rate):
+    """Seconds until ``debt`` tokens have been refilled, plus a margin."""
+    return math.ceil(debt / refill_rate) + 1
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Throttle requests per user (or IP for anonymous clients) with a token bucket.
+
+    Subclasses set ``scope``, which selects the per-role rates from
+    ``THROTTLING["RATES"][scope]``; a role without a rate (and no ``"default"``)
+    is not throttled. ``methods`` limits throttling to those HTTP methods.
+    """
+
+    scope = None
+    methods = None
+
+    def allow_request(self, request, view):
+        self._wait = None
+        if not get_throttle_setting("ENABLED"):
+            return True
+        if self.methods is not None and request.method not in self.methods:
+            return True
+
+        user = request.user
+        if user and user.is_authenticated:
+            role, ident = user.role, user.pk
+        else:
+            role, ident = ANONYMOUS, self.get_ident(request)
+        rate = get_rate(self.scope, role)
+        if rate is None:
+            return True
+
+        allowed, wait = take_token(f"throttle:{self.scope}:{role}:{ident}", *rate)
+        self._wait = wait
+        return allowed
+
+    def wait(self):
+        return self._wait
+
+
+class LessonCompleteThrottle(TokenBucketThrottle):
+    scope = "lesson_complete"
+
+
+class QuestionPostThrottle(TokenBucketThrottle):
+    scope = "question_post"
+    methods = ("POST",)
+
+
+class EnrollThrottle(TokenBucketThrottle):
+    scope = "enroll"
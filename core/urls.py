@@ -1,28 +1,60 @@
-from django.urls import path
+from django.urls import path, re_path
 from .views import (
     category_list_create,
     course_list_create,
     course_detail,
+    course_bundle,
     lesson_list_create,
     material_list_create,
     enrollment_list_create,
     question_list_create,
+    lesson_questions,
+    question_thread,
     mark_lesson_completed,
     enroll_course,
+    student_dashboard,
+    lesson_video,
+    material_download,
+    protected_media,
+    event_stream,
+    profile_list,
+    profile_detail,
 )
 
 urlpatterns = [
     path("categories/", category_list_create, name="category-list-create"),
     path("courses/", course_list_create, name="course-list-create"),
     path("courses/<int:pk>/", course_detail, name="course-detail"),
+    path("courses/<int:pk>/bundle/", course_bundle, name="course-bundle"),
     path("lessons/", lesson_list_create, name="lesson-list-create"),
     path("materials/", material_list_create, name="material-list-create"),
     path("enrollments/", enrollment_list_create, name="enrollment-list-create"),
+    path("dashboard/", student_dashboard, name="student-dashboard"),
     path("questions/", question_list_create, name="question-list-create"),
+    path("questions/<int:pk>/thread/", question_thread, name="question-thread"),
+    path(
+        "lessons/<int:lesson_id>/questions/",
+        lesson_questions,
+        name="lesson-questions",
+    ),
     path(
         "lessons/<int:lesson_id>/complete/",
         mark_lesson_completed,
         name="mark-lesson-completed",
     ),
     path('courses/<int:course_id>/enroll/', enroll_course, name='enroll-course'),
+    path("lessons/<int:lesson_id>/video/", lesson_video, name="lesson-video"),
+    path(
+        "materials/<int:material_id>/download/",
+        material_download,
+        name="material-download",
+    ),
+    path("media/protected/<path:path>", protected_media, name="protected-media"),
+    path("events/", event_stream, name="event-stream"),
+    path("profiles/", profile_list, name="profile-list"),
+    re_path(
+        r"^profiles/(?P<profile_id>[0-9a-f]{32})/$",
+        profile_detail,
+        name="profile-detail",
+    ),
 ]
@@ -1,8 +1,10 @@
+import asyncio
+
 from rest_framework.response import Response
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 from .models import Category, Course, Lesson, Material, Enrollment, QuestionAnswer, LessonProgress
 from .serializers import (
     CategorySerializer,
@@ -10,10 +12,36 @@ from .serializers import (
     LessonSerializer,
     MaterialSerializer,
     EnrollmentSerializer,
+    EnrollmentProgressSerializer,
+    DashboardEnrollmentSerializer,
     QuestionAnswerSerializer,
 )
-from drf_yasg.utils import swagger_auto_schema
+from lms_backend.docs import swagger_auto_schema
 from django.utils import timezone
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import Prefetch
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+from .delivery import build_signed_url, deliver_file, is_external, verify_signature
+from .access import is_enrolled
+from .scoping import (
+    CourseContentScope,
+    CourseScope,
+    EnrollmentScope,
+    LessonScope,
+    MaterialScope,
+    QuestionScope,
+)
+from .filters import CourseFilter, LessonFilter, MaterialFilter, QuestionAnswerFilter
+from .idempotency import idempotent
+from .throttling import EnrollThrottle, LessonCompleteThrottle, QuestionPostThrottle
+from .profiling import list_profiles, load_profile, profile_file
+from .events import format_sse, get_broker, lesson_channel, user_channel
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework.exceptions import AuthenticationFailed, PermissionDenied
 
 from rest_framework.decorators import permission_classes
 from rest_framework.permissions import IsAuthenticated
@@ -26,6 +54,13 @@ class MyPagination(PageNumberPagination):
     max_page_size = 100
 
 
+class KeysetPagination(CursorPagination):
+    page_size = 10
+    page_size_query_param = "limit"
+    max_page_size = 100
+    ordering = "-id"
+
+
 @swagger_auto_schema(method="post", request_body=CategorySerializer)
 @api_view(["GET", "POST"])
 @permission_classes(
@@ -55,15 +90,10 @@ def category_list_create(request):
 @permission_classes([IsAuthenticated])
 def course_list_create(request):
     if request.method == "GET":
-        if request.user.role == "admin":
-            courses = Course.objects.all()
-        elif request.user.role == "teacher":
-            courses = Course.objects.filter(teacher=request.user)
-        elif request.user.role == "student":
-            courses = Course.objects.all()  # or add filter for enrolled courses
-        else:
-            return Response({"detail": "Unauthorized role"}, status=403)
-
+        courses = CourseScope.queryset(
+            request.user, Course.objects.select_related("category", "instructor")
+        )
+        courses = CourseFilter.apply(courses, request.query_params)
         paginator = MyPagination()
         result_page = paginator.paginate_queryset(courses, request)
         serializer = CourseSerializer(result_page, many=True)
@@ -75,9 +105,7 @@ def course_list_create(request):
 
         serializer = CourseSerializer(data=request.data)
         if serializer.is_valid():
-            serializer.save(
-                teacher=request.user
-            )  # assuming you have a teacher FK in model
+            serializer.save(instructor=request.user)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -87,18 +115,18 @@ def course_list_create(request):
 @permission_classes([IsAuthenticated])
 def course_detail(request, pk):
     try:
-        course = Course.objects.get(pk=pk)
+        course = CourseScope.queryset(
+            request.user, Course.objects.select_related("category", "instructor")
+        ).get(pk=pk)
     except Course.DoesNotExist:
         return Response({"detail": "Course not found"}, status=404)
 
     if request.method == "GET":
-        if request.user.role == "admin" or request.user == course.teacher:
-            serializer = CourseSerializer(course)
-            return Response(serializer.data)
-        return Response({"detail": "Permission denied"}, status=403)
+        serializer = CourseSerializer(course)
+        return Response(serializer.data)
 
     elif request.method == "PUT":
-        if request.user.role != "teacher" or request.user != course.teacher:
+        if request.user.role != "teacher" or course.instructor_id != request.user.id:
             return Response(
                 {"detail": "Only the course owner (teacher) can update this course."},
                 status=403,
@@ -106,25 +134,89 @@ def course_detail(request, pk):
 
         serializer = CourseSerializer(course, data=request.data)
         if serializer.is_valid():
-            serializer.save(teacher=request.user)
+            serializer.save(instructor=request.user)
             return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     elif request.method == "DELETE":
-        if request.user.role != "teacher" or request.user != course.teacher:
+        if request.user.role != "teacher" or course.instructor_id != request.user.id:
             return Response(
                 {"detail": "Only the course owner (teacher) can delete this course."},
                 status=403,
             )
-        course.delete()
+        # Soft delete; purge_archived_courses removes the rows in small batches later.
+        course.is_active = False
+        course.save(update_fields=["is_active", "updated_at"])
         return Response({"detail": "Course deleted"}, status=status.HTTP_204_NO_CONTENT)
 
 
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def course_bundle(request, pk):
+    """Course page in one round trip: course, lessons, materials and own progress."""
+    try:
+        course = (
+            CourseContentScope.queryset(
+                request.user, Course.objects.select_related("category", "instructor")
+            )
+            .prefetch_related(
+                Prefetch("lesson_set", queryset=Lesson.objects.order_by("id")),
+                Prefetch("material_set", queryset=Material.objects.order_by("id")),
+            )
+            .get(pk=pk)
+        )
+    except Course.DoesNotExist:
+        return Response({"detail": "Course not found"}, status=404)
+
+    enrollment = None
+    completed_ids = set()
+    if is_enrolled(request.user, course.id):
+        enrollment = Enrollment.objects.filter(user=request.user, course=course).first()
+    if enrollment is not None:
+        completed_ids = set(
+            LessonProgress.objects.filter(
+                enrollment=enrollment, is_completed=True
+            ).values_list("lesson_id", flat=True)
+        )
+
+    context = {"request": request, "completed_lesson_ids": completed_ids}
+    return Response(
+        {
+            "course": CourseSerializer(course, context=context).data,
+            "lessons": LessonSerializer(
+                course.lesson_set.all(), many=True, context=context
+            ).data,
+            "materials": MaterialSerializer(
+                course.material_set.all(), many=True, context=context
+            ).data,
+            "enrollment": (
+                EnrollmentProgressSerializer(enrollment).data if enrollment else None
+            ),
+        }
+    )
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def student_dashboard(request):
+    """Every enrollment with progress and continue-learning pointers, in one query."""
+    enrollments = (
+        Enrollment.objects.visible().filter(user=request.user)
+        .select_related("course", "last_lesson", "next_lesson")
+        .order_by("-updated_at")
+    )
+    serializer = DashboardEnrollmentSerializer(enrollments, many=True)
+    return Response(serializer.data)
+
+
 @swagger_auto_schema(method="post", request_body=LessonSerializer)
 @api_view(["GET", "POST"])
 def lesson_list_create(request):
     if request.method == "GET":
-        lessons = Lesson.objects.all()
+        lessons = LessonFilter.apply(
+            LessonScope.queryset(request.user, Lesson.objects.visible()),
+            request.query_params,
+        )
         paginator = MyPagination()
         result_page = paginator.paginate_queryset(lessons, request)
         serializer = LessonSerializer(result_page, many=True, context={'request': request})
@@ -141,7 +233,10 @@ def lesson_list_create(request):
 @api_view(["GET", "POST"])
 def material_list_create(request):
     if request.method == "GET":
-        materials = Material.objects.all()
+        materials = MaterialFilter.apply(
+            MaterialScope.queryset(request.user, Material.objects.visible()),
+            request.query_params,
+        )
         paginator = MyPagination()
         result_page = paginator.paginate_queryset(materials, request)
         serializer = MaterialSerializer(result_page, many=True)
@@ -157,13 +252,15 @@ def material_list_create(request):
 @swagger_auto_schema(method="post", request_body=EnrollmentSerializer)
 @api_view(["GET", "POST"])
 @permission_classes([IsAuthenticated])
+@idempotent
 def enrollment_list_create(request):
     if request.method == "GET":
-        # Only show enrollments for the logged-in user (student)
-        if request.user.role == "student":
-            enrollments = Enrollment.objects.filter(user=request.user)
-        else:
-            enrollments = Enrollment.objects.all()
+        enrollments = EnrollmentScope.queryset(
+            request.user,
+            Enrollment.objects.select_related(
+                "course__category", "course__instructor"
+            ),
+        ).order_by("-id")
         paginator = MyPagination()
         result_page = paginator.paginate_queryset(enrollments, request)
         serializer = EnrollmentSerializer(result_page, many=True)
@@ -171,16 +268,27 @@ def enrollment_list_create(request):
     elif request.method == "POST":
         serializer = EnrollmentSerializer(data=request.data)
         if serializer.is_valid():
-            serializer.save()
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
+            data = serializer.validated_data
+            if is_enrolled(data["user"], data["course"].id):
+                return Response(
+                    {"detail": "Already enrolled."}, status=status.HTTP_200_OK
+                )
+            enrollment = Enrollment.objects.enroll(**data)
+            return Response(
+                EnrollmentSerializer(enrollment).data, status=status.HTTP_201_CREATED
+            )
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
 @swagger_auto_schema(method="post", request_body=QuestionAnswerSerializer)
 @api_view(["GET", "POST"])
+@throttle_classes([QuestionPostThrottle])
 def question_list_create(request):
     if request.method == "GET":
-        questions = QuestionAnswer.objects.all()
+        questions = QuestionAnswerFilter.apply(
+            QuestionScope.queryset(request.user, QuestionAnswer.objects.visible()),
+            request.query_params,
+        )
         paginator = MyPagination()
         result_page = paginator.paginate_queryset(questions, request)
         serializer = QuestionAnswerSerializer(result_page, many=True)
@@ -193,14 +301,56 @@ def question_list_create(request):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(["GET"])
+def lesson_questions(request, lesson_id):
+    """Top-level questions for a lesson, newest first, keyset paginated."""
+    questions = QuestionScope.queryset(
+        request.user, QuestionAnswer.objects.visible()
+    ).filter(lesson_id=lesson_id, parent__isnull=True)
+    paginator = KeysetPagination()
+    result_page = paginator.paginate_queryset(questions, request)
+    serializer = QuestionAnswerSerializer(result_page, many=True)
+    return paginator.get_paginated_response(serializer.data)
+
+
+@api_view(["GET"])
+def question_thread(request, pk):
+    """A question with all of its replies nested, loaded with one range query."""
+    try:
+        root = QuestionScope.queryset(
+            request.user, QuestionAnswer.objects.visible()
+        ).only("path").get(pk=pk)
+    except QuestionAnswer.DoesNotExist:
+        return Response({"detail": "Question not found"}, status=404)
+
+    nodes = QuestionAnswer.objects.visible().filter(
+        path__startswith=root.path
+    ).order_by("path")
+    by_id = {}
+    thread = None
+    for node in QuestionAnswerSerializer(nodes, many=True).data:
+        node["replies"] = []
+        by_id[node["id"]] = node
+        parent = by_id.get(node["parent"])
+        if parent is not None:
+            parent["replies"].append(node)
+        elif thread is None:
+            thread = node
+    return Response(thread)
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@throttle_classes([LessonCompleteThrottle])
+@idempotent
 def mark_lesson_completed(request, lesson_id):
     try:
-        lesson = Lesson.objects.get(pk=lesson_id)
+        lesson = Lesson.objects.visible().get(pk=lesson_id)
+        if not is_enrolled(request.user, lesson.course_id):
+            raise Enrollment.DoesNotExist
         enrollment = Enrollment.objects.get(
             user=request.user,
-            course=lesson.course
+            course_id=lesson.course_id
         )
         progress, created = LessonProgress.objects.get_or_create(
             enrollment=enrollment,
@@ -210,15 +360,11 @@ def mark_lesson_completed(request, lesson_id):
         progress.completed_at = timezone.now()
         progress.save()
 
-        # Update overall course progress
-        total_lessons = lesson.course.lesson_set.count()
-        completed_lessons = LessonProgress.objects.filter(
-            enrollment=enrollment,
-            is_completed=True
-        ).count()
-
-        enrollment.progress = (completed_lessons / total_lessons) * 100
-        enrollment.save()
+        # Update overall course progress and the dashboard's lesson pointers
+        Enrollment.refresh_progress(pk=enrollment.pk)
+        enrollment.refresh_from_db(fields=["progress", "next_lesson", "is_completed"])
+        enrollment.last_lesson = lesson
+        enrollment.save(update_fields=["last_lesson", "updated_at"])
 
         return Response({'status': 'success'})
     except (Lesson.DoesNotExist, Enrollment.DoesNotExist):
@@ -230,22 +376,166 @@ def mark_lesson_completed(request, lesson_id):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@throttle_classes([EnrollThrottle])
+@idempotent
 def enroll_course(request, course_id):
     user = request.user
     try:
-        course = Course.objects.get(pk=course_id)
-        enrollment, created = Enrollment.objects.get_or_create(
-            user=user,
-            course=course,
-            defaults={'price': course.price}
-        )
-        if created:
-            return Response({'message': 'Enrolled successfully!'}, status=status.HTTP_201_CREATED)
-        else:
-            return Response({'message': 'Already enrolled.'}, status=status.HTTP_200_OK)
+        course = Course.objects.only("id", "price").get(pk=course_id)
     except Course.DoesNotExist:
         return Response({'error': 'Course not found.'}, status=status.HTTP_404_NOT_FOUND)
 
+    if is_enrolled(user, course.id):
+        return Response({'message': 'Already enrolled.'}, status=status.HTTP_200_OK)
+    Enrollment.objects.enroll(user=user, course=course, price=course.price)
+    return Response({'message': 'Enrolled successfully!'}, status=status.HTTP_201_CREATED)
+
+
+def _signed_media_response(request, location):
+    if is_external(location):
+        return Response({"url": location, "expires": None})
+    url, expires = build_signed_url(request, location)
+    return Response({"url": url, "expires": expires})
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def lesson_video(request, lesson_id):
+    try:
+        lesson = LessonScope.queryset(request.user, Lesson.objects.visible()).get(
+            pk=lesson_id
+        )
+    except Lesson.DoesNotExist:
+        return Response({"detail": "Lesson not found"}, status=404)
+
+    if not lesson.video:
+        return Response({"detail": "Lesson has no video"}, status=404)
+    return _signed_media_response(request, lesson.video)
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def material_download(request, material_id):
+    try:
+        material = MaterialScope.queryset(
+            request.user, Material.objects.visible()
+        ).get(pk=material_id)
+    except Material.DoesNotExist:
+        return Response({"detail": "Material not found"}, status=404)
+
+    if not material.file:
+        return Response({"detail": "Material has no file"}, status=404)
+    return _signed_media_response(request, material.file.name)
+
+
+@require_GET
+def protected_media(request, path):
+    # Authorization already happened when the URL was signed; no DB access here.
+    if not verify_signature(
+        path, request.GET.get("expires"), request.GET.get("signature")
+    ):
+        raise Http404("Invalid or expired link")
+    return deliver_file(request, path)
+
+
+def _stream_user(request):
+    # EventSource cannot send headers, so the JWT may also come as ?token=.
+    auth = JWTAuthentication()
+    raw_token = request.GET.get("token")
+    if raw_token is None:
+        header = auth.get_header(request)
+        raw_token = auth.get_raw_token(header) if header else None
+    if raw_token is None:
+        return None
+    try:
+        return auth.get_user(auth.get_validated_token(raw_token))
+    except (InvalidToken, AuthenticationFailed):
+        return None
+
+
+def _stream_channels(request, user):
+    channels = [user_channel(user.id)]
+    lesson_ids = [
+        int(value)
+        for value in request.GET.get("lessons", "").split(",")
+        if value.isdigit()
+    ]
+    try:
+        lessons = LessonScope.queryset(user, Lesson.objects.visible())
+    except PermissionDenied:
+        return channels
+    channels += [
+        lesson_channel(lesson_id)
+        for lesson_id in lessons.filter(pk__in=lesson_ids).values_list("id", flat=True)
+    ]
+    return channels
+
+
+async def _event_source(subscription, heartbeat):
+    try:
+        yield ": connected\n\n"
+        while True:
+            try:
+                event = await subscription.get(timeout=heartbeat)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            yield format_sse(event)
+    finally:
+        subscription.close()
+
+
+async def event_stream(request):
+    """Server-Sent Events for the caller's progress and replies, plus ?lessons= Q&A."""
+    if request.method != "GET":
+        return HttpResponse(status=405)
+    if not isinstance(request, ASGIRequest):
+        # WSGI buffers an async stream to completion, so it would never send a
+        # byte while pinning a worker; see lms_backend/asgi.py.
+        return HttpResponse(
+            "Event streams require an ASGI server.", status=501, content_type="text/plain"
+        )
+    user = await sync_to_async(_stream_user)(request)
+    if user is None:
+        return HttpResponse(status=401)
+
+    channels = await sync_to_async(_stream_channels)(request, user)
+    subscription = get_broker().subscribe(channels)
+    response = StreamingHttpResponse(
+        _event_source(subscription, getattr(settings, "EVENTS_HEARTBEAT", 15)),
+        content_type="text/event-stream",
+    )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def profile_list(request):
+    if request.user.role != "admin":
+        return Response({"detail": "Only admin can view profiles."}, status=403)
+    return Response(list_profiles())
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def profile_detail(request, profile_id):
+    """Summary of one profiled request; ?download=1 returns the raw cProfile dump."""
+    if request.user.role != "admin":
+        return Response({"detail": "Only admin can view profiles."}, status=403)
+    if request.query_params.get("download") == "1":
+        path = profile_file(profile_id)
+        if path is None:
+            return Response({"detail": "Profile not found"}, status=404)
+        return FileResponse(
+            open(path, "rb"), as_attachment=True, filename=f"{profile_id}.prof"
+        )
+    summary = load_profile(profile_id)
+    if summary is None:
+        return Response({"detail": "Profile not found"}, status=404)
+    return Response(summary)
+
 
 @api_view(["GET", "PUT"])
 @permission_classes([IsAuthenticated])
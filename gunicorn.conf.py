@@ -0,0 +1,36 @@
+"""Gunicorn settings: run ``gunicorn`` from the project root and this file is picked up."""
+
+import multiprocessing
+import os
+
+# ASGI through uvicorn workers: /api/events/ streams only work over ASGI, and an
+# event loop per worker holds many idle streams without a thread each.
+wsgi_app = "lms_backend.asgi:application"
+worker_class = "uvicorn_worker.UvicornWorker"
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+# Async workers do not block on slow clients, so one per core is enough, but
+# the in-process events broker only reaches streams on its own worker: with it
+# configured, run a single worker and refuse to start more.
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "lms_backend.settings")
+from django.conf import settings  # noqa: E402
+
+in_process_broker = settings.EVENTS_BROKER == "core.events.InProcessBroker"
+workers = int(
+    os.environ.get("WEB_CONCURRENCY", 1 if in_process_broker else multiprocessing.cpu_count())
+)
+# Import Django, the URLconf and all views once in the master; forked workers
+# inherit them copy-on-write and boot without re-importing anything.
+preload_app = True
+# Recycling workers is cheap once boot is just a fork.
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 1000))
+max_requests_jitter = 100
+
+
+def on_starting(server):
+    # Checked here rather than above so that --workers on the command line is caught too.
+    if in_process_broker and server.cfg.workers > 1:
+        raise RuntimeError(
+            f"{server.cfg.workers} workers with EVENTS_BROKER={settings.EVENTS_BROKER}: "
+            "events would only reach clients on the publishing worker. Run one "
+            "worker or configure a shared broker."
+        )
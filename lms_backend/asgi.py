@@ -3,6 +3,10 @@ ASGI config for lms_backend project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve through an ASGI server (``uvicorn lms_backend.asgi:application``) so the
+long-lived /api/events/ stream does not hold a worker thread per client. Under
+WSGI (including ``runserver``) that endpoint answers 501.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -10,7 +14,12 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 import os
 
 from django.core.asgi import get_asgi_application
+from django.urls import get_resolver
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'lms_backend.settings')
 
 application = get_asgi_application()
+
+# Django resolves the URLconf on the first request; load it (and every view module)
+# now so it is paid once at boot, and shared by workers when the server preloads.
+get_resolver().url_patterns
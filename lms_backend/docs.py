@@ -0,0 +1,43 @@
+"""Lazily built drf_yasg views, so workers only import drf_yasg when docs are requested."""
+
+from functools import cache
+
+from django.conf import settings
+from rest_framework import permissions
+
+
+def swagger_auto_schema(*args, **kwargs):
+    """drf_yasg's decorator, or a no-op that avoids importing drf_yasg when docs are off."""
+    if not settings.API_DOCS_ENABLED:
+        return lambda view: view
+    from drf_yasg.utils import swagger_auto_schema as decorator
+
+    return decorator(*args, **kwargs)
+
+
+@cache
+def _schema_view():
+    from drf_yasg import openapi
+    from drf_yasg.views import get_schema_view
+
+    return get_schema_view(
+        openapi.Info(
+            title="LMS API",
+            default_version="v1",
+            description="Learning Management System API Documentation",
+        ),
+        public=True,
+        permission_classes=(permissions.AllowAny,),
+    )
+
+
+@cache
+def _ui_view(renderer):
+    return _schema_view().with_ui(renderer, cache_timeout=0)
+
+
+def docs_view(renderer):
+    def view(request, *args, **kwargs):
+        return _ui_view(renderer)(request, *args, **kwargs)
+
+    return view
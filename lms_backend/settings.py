@@ -36,6 +36,15 @@ CORS_ALLOWED_ORIGINS = [
 ]
 
 
+# Swagger/ReDoc routes. Set API_DOCS_ENABLED=0 in production to skip loading
+# drf_yasg entirely (views use lms_backend.docs.swagger_auto_schema, a no-op
+# then); when enabled, the schema view is still built on first use.
+API_DOCS_ENABLED = os.environ.get("API_DOCS_ENABLED", "1") == "1"
+
+# Ceiling for `manage.py import_report` (median ms to import the WSGI app in a
+# fresh interpreter); run it in CI so boot-time regressions fail the build.
+IMPORT_TIME_BUDGET_MS = float(os.environ.get("IMPORT_TIME_BUDGET_MS", 1000))
+
 # Application definition
 
 INSTALLED_APPS = [
@@ -48,7 +57,8 @@ INSTALLED_APPS = [
     "django.contrib.staticfiles",
     'rest_framework',
     "rest_framework.authtoken",
-    "drf_yasg",
+    "rest_framework_simplejwt.token_blacklist",
+    *(["drf_yasg"] if API_DOCS_ENABLED else []),
     "users",
     "core",
 ]
@@ -73,6 +83,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "core.profiling.ProfilingMiddleware",
 ]
 
 ROOT_URLCONF = "lms_backend.urls"
@@ -95,6 +106,73 @@ TEMPLATES = [
 WSGI_APPLICATION = "lms_backend.wsgi.application"
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "lms-default",
+    },
+    # Throttle buckets (see THROTTLING). Kept apart so other cache churn cannot
+    # evict them; an evicted bucket comes back full and lets a burst through.
+    "throttle": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "lms-throttle",
+        "OPTIONS": {"MAX_ENTRIES": 100000},
+    },
+}
+
+# Token-bucket limits per endpoint scope and role ("anonymous" for clients without
+# a token, "default" for any role not listed). "30/min" refills 30 tokens a
+# minute with a burst of 30; "30/min:60" allows bursts of 60. Roles mapped to
+# None, or missing with no default, are not throttled. Buckets live in CACHE; with
+# LocMem each worker process keeps its own, so use a shared cache to enforce
+# limits across workers. Start the server with THROTTLING_ENABLED=0 when running
+# `manage.py loadtest`, or most of its traffic measures 429s.
+THROTTLING = {
+    "ENABLED": os.environ.get("THROTTLING_ENABLED", "1") == "1",
+    "CACHE": "throttle",
+    "RATES": {
+        "lesson_complete": {"student": "60/min:20", "teacher": "60/min", "admin": None},
+        "question_post": {
+            "anonymous": "5/min",
+            "student": "10/min:5",
+            "teacher": "30/min",
+            "admin": None,
+        },
+        "enroll": {"student": "10/min:5", "teacher": "10/min", "admin": None},
+    },
+}
+
+# Seconds a user's enrolled course ids stay cached (invalidated on Enrollment save/delete).
+# Cached sets are keyed by User.enrollment_version, so every worker stops using
+# one as soon as an enrollment changes, even with a per-process cache.
+ENROLLMENT_CACHE_TTL = 300
+
+
+# Seconds a stored Idempotency-Key response can be replayed.
+IDEMPOTENCY_KEY_TTL = 24 * 60 * 60
+# Seconds after which an unfinished request's key reservation is considered abandoned.
+IDEMPOTENCY_IN_FLIGHT_TIMEOUT = 60
+
+# Per-request cProfile capture: admins opt in with "X-Profile: 1" or ?profile=1,
+# and SAMPLE_RATE profiles that fraction of all requests. Browse at /api/profiles/.
+PROFILING = {
+    "ENABLED": os.environ.get("PROFILING_ENABLED", "") == "1",
+    "SAMPLE_RATE": float(os.environ.get("PROFILING_SAMPLE_RATE", "0")),
+    "DIRECTORY": BASE_DIR / "profiles",
+    "MAX_FILES": 200,
+}
+
+# Push notifications (Server-Sent Events at /api/events/, served over ASGI).
+# The in-process broker only reaches clients connected to the same process;
+# point EVENTS_BROKER at a shared Broker implementation when running several
+# (gunicorn.conf.py runs a single worker, and refuses more, until then).
+EVENTS_BROKER = "core.events.InProcessBroker"
+EVENTS_HEARTBEAT = 15  # seconds between keep-alive comments
+
+
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
@@ -147,7 +225,16 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 STATICFILES_DIRS = [BASE_DIR / 'static']  # Ensure this directory exists
 
 MEDIA_URL = '/media/'
-MEDIA_ROOT = [BASE_DIR/ 'media']
+MEDIA_ROOT = BASE_DIR / 'media'
+
+# Protected media (lesson videos, materials) is authorized once by the API,
+# then handed to the front proxy or served with HTTP Range support.
+# BACKEND: "django" (direct, Range-aware), "x-accel" (nginx) or "x-sendfile" (apache).
+MEDIA_DELIVERY = {
+    "BACKEND": os.environ.get("MEDIA_DELIVERY_BACKEND", "django"),
+    "ACCEL_PREFIX": "/protected-media/",
+    "URL_TTL": 300,  # seconds a signed URL stays valid
+}
 
 
 # Default primary key field type
@@ -178,4 +265,9 @@ SIMPLE_JWT = {
     "REFRESH_TOKEN_LIFETIME": timedelta(days=7),
     "ROTATE_REFRESH_TOKENS": True,
     "BLACKLIST_AFTER_ROTATION": True,
+    # Revoked jtis are cached in front of the blacklist tables; tokens missing
+    # from the cache are always checked in the DB. Run `manage.py prune_tokens`
+    # periodically to drop expired tokens and preload the cache.
+    "TOKEN_REFRESH_SERIALIZER": "users.serializers.CachedTokenRefreshSerializer",
+    "TOKEN_VERIFY_SERIALIZER": "users.serializers.CachedTokenVerifySerializer",
 }
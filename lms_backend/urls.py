@@ -2,21 +2,8 @@
 from django.contrib import admin
 from django.urls import path, include
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView, TokenVerifyView
-from rest_framework import permissions
-from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
 from django.conf import settings
-from django.conf.urls.static import static
-
-schema_view = get_schema_view(
-    openapi.Info(
-        title="LMS API",
-        default_version="v1",
-        description="Learning Management System API Documentation",
-    ),
-    public=True,
-    permission_classes=(permissions.AllowAny,),
-)
+from .docs import docs_view
 
 urlpatterns = [
     path("admin/", admin.site.urls),
@@ -28,15 +15,11 @@ urlpatterns = [
     path("api/", include("users.urls")),
     # Core Features
     path("api/", include("core.urls")),
+]
+
+if settings.API_DOCS_ENABLED:
     # Documentation (drf_yasg)
-    path(
-        "swagger/",
-        schema_view.with_ui("swagger", cache_timeout=0),
-        name="schema-swagger-ui",
-    ),
-    path(
-        "redoc/",
-        schema_view.with_ui("redoc", cache_timeout=0),
-        name="schema-redoc",
-    ),
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    urlpatterns += [
+        path("swagger/", docs_view("swagger"), name="schema-swagger-ui"),
+        path("redoc/", docs_view("redoc"), name="schema-redoc"),
+    ]
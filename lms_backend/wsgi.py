@@ -10,7 +10,12 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/wsgi/
 import os
 
 from django.core.wsgi import get_wsgi_application
+from django.urls import get_resolver
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'lms_backend.settings')
 
 application = get_wsgi_application()
+
+# Django resolves the URLconf on the first request; load it (and every view module)
+# now so it is paid once at boot, and shared by workers when the server preloads.
+get_resolver().url_patterns
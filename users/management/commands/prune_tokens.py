@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from users.tokens import prune_expired_tokens, warm_revocation_cache
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired outstanding/blacklisted JWTs in batches and reload the "
+        "revoked-token cache."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        deleted = prune_expired_tokens(options["batch_size"])
+        loaded = warm_revocation_cache(options["batch_size"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Pruned {deleted} expired rows; cached {loaded} revoked tokens.")
+        )
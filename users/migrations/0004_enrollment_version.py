@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-19 16:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_user_directory_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='enrollment_version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -10,6 +10,16 @@ USER_ROLES = (
 class User(AbstractUser):
     role = models.CharField(max_length=10, choices=USER_ROLES)
     mobile_no = models.CharField(max_length=20, blank=True)
+    # Bumped on every enrollment change. The user row is loaded on each request
+    # anyway, so keying cached enrollment sets by it invalidates them on every
+    # worker at once.
+    enrollment_version = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            models.Index(fields=["role", "id"]),
+            models.Index(fields=["email"]),
+        ]
 
     def __str__(self):
         return f"{self.username} ({self.role})"
@@ -0,0 +1,81 @@
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from django.db.models.constants import LOOKUP_SEP
+from rest_framework.exceptions import PermissionDenied
+
+from .models import User
+
+# Placeholder in a rule for the requesting user's primary key.
+CURRENT_USER = object()
+# Role whose rules apply to superusers; `createsuperuser` leaves role empty.
+SUPERUSER_ROLE = "admin"
+
+
+def _check_lookup(model, lookup):
+    """Raise ImproperlyConfigured unless ``lookup`` resolves against ``model``."""
+    parts = lookup.split(LOOKUP_SEP)
+    opts = model._meta
+    field = None
+    for i, part in enumerate(parts):
+        try:
+            field = opts.get_field(part)
+        except FieldDoesNotExist:
+            # A trailing lookup type such as __in or __gte is fine.
+            if i == len(parts) - 1 and field is not None and field.get_lookup(part):
+                return
+            raise ImproperlyConfigured(
+                f"{model.__name__} has no field {part!r} (in lookup {lookup!r})"
+            )
+        if field.is_relation and i < len(parts) - 1:
+            opts = field.related_model._meta
+
+
+class RoleScope:
+    """Declarative per-role queryset filters.
+
+    ``rules`` maps a role to a dict of ORM lookups; an empty dict means every row.
+    A value may be ``CURRENT_USER`` or a callable taking the user. Roles missing
+    from ``rules`` are denied; superusers get the ``SUPERUSER_ROLE`` rules whatever
+    their role. Lookups are validated when the subclass is defined, so a wrong
+    field name fails at import rather than at request time.
+    """
+
+    model = None
+    rules = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        for lookups in cls.rules.values():
+            for lookup in lookups:
+                _check_lookup(cls.model, lookup)
+
+    @classmethod
+    def queryset(cls, user, queryset=None):
+        if queryset is None:
+            queryset = cls.model.objects.all()
+        lookups = cls.rules.get(role_of(user))
+        if lookups is None:
+            raise PermissionDenied("Unauthorized role")
+        return queryset.filter(
+            **{lookup: _resolve(value, user) for lookup, value in lookups.items()}
+        )
+
+
+def role_of(user):
+    if getattr(user, "is_superuser", False):
+        return SUPERUSER_ROLE
+    return getattr(user, "role", None)
+
+
+def _resolve(value, user):
+    if value is CURRENT_USER:
+        return user.pk
+    return value(user) if callable(value) else value
+
+
+class UserScope(RoleScope):
+    model = User
+    rules = {
+        "admin": {},
+        "teacher": {"id": CURRENT_USER},
+        "student": {"id": CURRENT_USER},
+    }
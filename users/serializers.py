@@ -2,6 +2,15 @@ from rest_framework import serializers
 from .models import User
 from django.contrib.auth.hashers import make_password
 from django.contrib.auth import authenticate
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer, TokenVerifySerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import UntypedToken
+from .tokens import CachedRefreshToken, is_revoked
+
+# Columns the user directory loads; never the password hash.
+DIRECTORY_FIELDS = [
+    'id', 'username', 'email', 'role', 'first_name', 'last_name', 'is_active', 'date_joined'
+]
 
 class UserSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, required=True)
@@ -24,6 +33,11 @@ class UserSerializer(serializers.ModelSerializer):
         validated_data.pop('password2', None)  # changed confirm_password to password2
         return super().create(validated_data)
 
+class UserDirectorySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = User
+        fields = DIRECTORY_FIELDS
+
 class AuthSerializer(serializers.Serializer):
     username = serializers.CharField()
     password = serializers.CharField(write_only=True)
@@ -35,4 +49,14 @@ class AuthSerializer(serializers.Serializer):
             return data
         raise serializers.ValidationError("Invalid credentials")
 
-
+class CachedTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = CachedRefreshToken
+
+class CachedTokenVerifySerializer(TokenVerifySerializer):
+    def validate(self, attrs):
+        token = UntypedToken(attrs['token'])
+        if api_settings.BLACKLIST_AFTER_ROTATION and is_revoked(
+            token.get(api_settings.JTI_CLAIM), token['exp']
+        ):
+            raise serializers.ValidationError("Token is blacklisted")
+        return {}
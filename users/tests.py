@@ -1,3 +1,137 @@
+import sys
+
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.token_blacklist.models import (
+    BlacklistedToken,
+    OutstandingToken,
+)
+
+from .models import User
+from .scoping import CURRENT_USER, RoleScope
+from .tokens import CachedRefreshToken
+from .views import _prefix_upper_bound
+
+
+class UserDirectoryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            username="admin", password="pw", email="admin@example.com", role="admin"
+        )
+        for name in ("alice", "alicia", "ali\U0001f600", "bob"):
+            User.objects.create_user(
+                username=name, password="pw", email=f"{name}@example.com", role="student"
+            )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def usernames(self, **params):
+        response = self.client.get(reverse("user-list-create"), params)
+        self.assertEqual(response.status_code, 200)
+        return [row["username"] for row in response.data["results"]]
+
+    def test_superuser_without_role_lists_everyone(self):
+        root = User.objects.create_superuser(
+            username="root", password="pw", email="root@example.com"
+        )
+        self.client.force_authenticate(root)
+        self.assertEqual(len(self.usernames()), 6)
+
+    def test_student_sees_only_self(self):
+        self.client.force_authenticate(User.objects.get(username="bob"))
+        self.assertEqual(self.usernames(), ["bob"])
+
+    def test_prefix_filters(self):
+        self.assertEqual(self.usernames(username="ali"), ["alice", "alicia", "ali\U0001f600"])
+        self.assertEqual(self.usernames(email="bob@"), ["bob"])
+        self.assertEqual(self.usernames(username="alice", role="student"), ["alice"])
+
+    def test_prefix_upper_bound(self):
+        self.assertEqual(_prefix_upper_bound("ab"), "ac")
+        self.assertEqual(_prefix_upper_bound("a\ud7ff"), "a\ue000")
+        self.assertEqual(_prefix_upper_bound("a" + chr(sys.maxunicode)), "b")
+        self.assertIsNone(_prefix_upper_bound(chr(sys.maxunicode)))
+
+    def test_prefix_filters_use_index(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("Plan text is SQLite-specific.")
+        for field in ("username", "email"):
+            with CaptureQueriesContext(connection) as queries:
+                self.usernames(**{field: "ali"})
+            sql = queries.captured_queries[-1]["sql"]
+            with connection.cursor() as cursor:
+                cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+                plan = " ".join(row[-1] for row in cursor.fetchall())
+            self.assertIn(f"({field}>? AND {field}<?)", plan)
+
+
+class TokenRevocationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="student", password="pw", role="student")
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def refresh(self, token):
+        return self.client.post(reverse("token_refresh"), {"refresh": str(token)})
+
+    def verify(self, token):
+        return self.client.post(reverse("token_verify"), {"token": str(token)})
+
+    def test_rotation_revokes_the_old_token(self):
+        token = CachedRefreshToken.for_user(self.user)
+        response = self.refresh(token)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.verify(response.data["refresh"]).status_code, 200)
+        self.assertEqual(self.refresh(token).status_code, 401)
+        self.assertEqual(self.verify(token).status_code, 400)
+
+    def test_blacklisted_token_rejected_after_cache_eviction(self):
+        token = CachedRefreshToken.for_user(self.user)
+        token.blacklist()
+        cache.clear()
+        self.assertEqual(self.refresh(token).status_code, 401)
+        self.assertEqual(self.verify(token).status_code, 400)
+
+    def test_admin_blacklist_bypassing_the_cache(self):
+        token = CachedRefreshToken.for_user(self.user)
+        self.assertEqual(self.verify(token).status_code, 200)
+        BlacklistedToken.objects.create(
+            token=OutstandingToken.objects.get(jti=token["jti"])
+        )
+        self.assertEqual(self.refresh(token).status_code, 401)
+        self.assertEqual(self.verify(token).status_code, 400)
+
+
+class RoleScopeTests(TestCase):
+    def test_bad_lookup_fails_at_class_definition(self):
+        with self.assertRaises(ImproperlyConfigured):
+
+            class BrokenScope(RoleScope):
+                model = User
+                rules = {"student": {"profile__no_such_field": CURRENT_USER}}
+
+        with self.assertRaises(ImproperlyConfigured):
+
+            class BrokenLookupTypeScope(RoleScope):
+                model = User
+                rules = {"student": {"id__no_such_lookup": CURRENT_USER}}
+
+    def test_trailing_lookup_type_allowed(self):
+        class ScopeWithLookupType(RoleScope):
+            model = User
+            rules = {"student": {"id__in": lambda user: [user.pk]}}
 
-# Create your tests here.
+        user = User.objects.create_user(username="student", password="pw", role="student")
+        User.objects.create_user(username="other", password="pw", role="student")
+        self.assertEqual(list(ScopeWithLookupType.queryset(user)), [user])
@@ -0,0 +1,99 @@
+import time
+
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import (
+    BlacklistedToken,
+    OutstandingToken,
+)
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+# Only revocations are cached. A miss may be an evicted entry, a revocation
+# cached on another worker, or a blacklist row added in the admin, so it is
+# always confirmed in the DB.
+REVOKED_KEY = "jwt-revoked:{jti}"
+
+
+def _ttl(exp):
+    return max(int(exp - time.time()), 1)
+
+
+def mark_revoked(jti, exp):
+    cache.set(REVOKED_KEY.format(jti=jti), True, _ttl(exp))
+
+
+def is_revoked(jti, exp):
+    """Cache first for known revocations; anything else is answered by the DB."""
+    if cache.get(REVOKED_KEY.format(jti=jti)):
+        return True
+    revoked = BlacklistedToken.objects.filter(token__jti=jti).exists()
+    if revoked:
+        mark_revoked(jti, exp)
+    return revoked
+
+
+def warm_revocation_cache(batch_size=1000):
+    """Load every unexpired revoked jti into the cache."""
+    now = timezone.now()
+    rows = (
+        BlacklistedToken.objects.filter(token__expires_at__gt=now)
+        .values_list("token__jti", "token__expires_at")
+        .iterator(chunk_size=batch_size)
+    )
+    loaded = 0
+    batch = {}
+    for jti, expires_at in rows:
+        batch[REVOKED_KEY.format(jti=jti)] = expires_at
+        if len(batch) >= batch_size:
+            loaded += _set_batch(batch)
+            batch = {}
+    loaded += _set_batch(batch)
+    return loaded
+
+
+def _set_batch(batch):
+    # set_many takes one timeout, so group by the remaining lifetime.
+    by_ttl = {}
+    for key, expires_at in batch.items():
+        by_ttl.setdefault(_ttl(expires_at.timestamp()), {})[key] = True
+    for ttl, values in by_ttl.items():
+        cache.set_many(values, ttl)
+    return len(batch)
+
+
+def prune_expired_tokens(batch_size=1000):
+    """Delete expired outstanding tokens (and their blacklist rows) in batches."""
+    deleted = 0
+    expired = OutstandingToken.objects.filter(expires_at__lte=timezone.now())
+    while True:
+        ids = list(expired.values_list("pk", flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        deleted += OutstandingToken.objects.filter(pk__in=ids).delete()[0]
+
+
+class CachedRefreshToken(RefreshToken):
+    """Refresh token whose blacklist checks go through the revocation cache."""
+
+    def check_blacklist(self):
+        if is_revoked(self.payload[api_settings.JTI_CLAIM], self.payload["exp"]):
+            raise TokenError("Token is blacklisted")
+
+    def blacklist(self):
+        jti = self.payload[api_settings.JTI_CLAIM]
+        exp = self.payload["exp"]
+        mark_revoked(jti, exp)
+        # Unlike the stock implementation, skip loading the user; the id is enough.
+        token, _ = OutstandingToken.objects.get_or_create(
+            jti=jti,
+            defaults={
+                "user_id": self.payload.get(api_settings.USER_ID_CLAIM),
+                "created_at": self.current_time,
+                "token": str(self),
+                "expires_at": datetime_from_epoch(exp),
+            },
+        )
+        return BlacklistedToken.objects.get_or_create(token=token)
@@ -1,16 +1,66 @@
+import sys
+
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
-from .models import User
-from .serializers import UserSerializer, AuthSerializer
-from drf_yasg.utils import swagger_auto_schema
+from .models import User, USER_ROLES
+from .serializers import UserSerializer, AuthSerializer, UserDirectorySerializer, DIRECTORY_FIELDS
+from rest_framework.pagination import CursorPagination
+from .scoping import UserScope
+from lms_backend.docs import swagger_auto_schema
 from rest_framework.views import APIView
 from rest_framework.authtoken.models import Token
 from django.urls import path
 
 
-@swagger_auto_schema(method="get", responses={200: UserSerializer(many=True)})
+class UserDirectoryPagination(CursorPagination):
+    page_size = 50
+    page_size_query_param = "limit"
+    max_page_size = 200
+    ordering = "id"
+
+
+def _filter_directory(users, params):
+    """Role and username/email prefix filters, each backed by an index."""
+    role = params.get("role")
+    if role:
+        if role not in dict(USER_ROLES):
+            return None
+        users = users.filter(role=role)
+    for field in ("username", "email"):
+        prefix = params.get(field)
+        if prefix:
+            users = users.filter(**_prefix_lookups(field, prefix))
+    return users
+
+
+def _prefix_upper_bound(prefix):
+    """Smallest string above every string starting with ``prefix``, or None."""
+    while prefix:
+        code = ord(prefix[-1]) + 1
+        if code == 0xD800:
+            code = 0xE000  # surrogates cannot be stored
+        if code <= sys.maxunicode:
+            return prefix[:-1] + chr(code)
+        prefix = prefix[:-1]
+    return None
+
+
+def _prefix_lookups(field, prefix):
+    # startswith alone compiles to LIKE 'x%', which neither SQLite nor PostgreSQL
+    # (without varchar_pattern_ops) serves from a plain b-tree index. The range
+    # lets the planner use the username/email index; startswith keeps it exact.
+    # Bumping the last code point bounds the range without a sentinel character,
+    # which any supplementary-plane character would sort above.
+    lookups = {f"{field}__gte": prefix, f"{field}__startswith": prefix}
+    upper = _prefix_upper_bound(prefix)
+    if upper is not None:
+        lookups[f"{field}__lt"] = upper
+    return lookups
+
+
+@swagger_auto_schema(method="get", responses={200: UserDirectorySerializer(many=True)})
 @swagger_auto_schema(method="post", request_body=UserSerializer)
 @api_view(["GET", "POST"])
 def user_list_create(request):
@@ -20,13 +70,17 @@ def user_list_create(request):
                 {"detail": "Authentication credentials were not provided."}, status=401
             )
 
-        if request.user.role == "admin":
-            users = User.objects.all()
-        else:
-            users = User.objects.filter(id=request.user.id)
+        users = _filter_directory(
+            UserScope.queryset(request.user).only(*DIRECTORY_FIELDS),
+            request.query_params,
+        )
+        if users is None:
+            return Response({"role": "Unknown role."}, status=400)
 
-        serializer = UserSerializer(users, many=True)
-        return Response(serializer.data)
+        paginator = UserDirectoryPagination()
+        result_page = paginator.paginate_queryset(users, request)
+        serializer = UserDirectorySerializer(result_page, many=True)
+        return paginator.get_paginated_response(serializer.data)
 
     elif request.method == "POST":
         serializer = UserSerializer(data=request.data)